@@ -1,18 +1,99 @@
 import os
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_file, g, Response
 import numpy as np
 import pandas as pd
 from datetime import datetime
+from PIL import Image
+import io
 import json
+import time
+import monitoring
+from serialization import respond, read_body
+from data.data_processor import FireDataProcessor
+from data.weather_store import WeatherStore
+from data.incidents import SharedIncidentTracker
 from models.fire_predictor import FireRiskPredictor
 from models.fire_detector import FireDetector
+from models.spectral import read_npy_buffer, read_raw_buffer
+from models.stream_detector import StreamDetector, iter_video_frames, iter_image_frames
+from models.nowcast import RiskRaster
+from models.fire_spread import FireSpreadSimulator
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'ecosentry-hackathon-project'
 
+data_processor = FireDataProcessor(os.path.join('data', 'sample_data'))
+
+# Server-side weather used when /api/predict requests leave weather out: a
+# gridded forecast directory if configured, otherwise the sample forecast.
+# Forecasts further than the tolerance from the prediction time are ignored,
+# so stale weather falls back to the defaults.
+weather_tolerance = np.timedelta64(int(float(os.environ.get('ECOSENTRY_WEATHER_TOLERANCE_HOURS', 24)) * 3600), 's')
+if os.environ.get('ECOSENTRY_WEATHER_DIR'):
+    weather_store = WeatherStore.load(os.environ['ECOSENTRY_WEATHER_DIR'], time_tolerance=weather_tolerance)
+else:
+    weather_store = data_processor.build_weather_store(time_tolerance=weather_tolerance)
+
 # Initialize models
-fire_predictor = FireRiskPredictor()
-fire_detector = FireDetector()
+# Set ECOSENTRY_RISK_MODEL to a bundle from `python -m models.risk_training` to serve a trained model
+fire_predictor = FireRiskPredictor(os.environ.get('ECOSENTRY_RISK_MODEL'), weather_store=weather_store)
+# Set ECOSENTRY_DETECTOR_MODEL to a .tflite file to serve detections without loading TensorFlow
+fire_detector = FireDetector(
+    os.environ.get('ECOSENTRY_DETECTOR_MODEL'),
+    bands=int(os.environ.get('ECOSENTRY_DETECTOR_BANDS', 3))
+)
+
+spread_simulator = FireSpreadSimulator(
+    fire_predictor,
+    workers=int(os.environ.get('ECOSENTRY_SIMULATION_WORKERS', 1))
+)
+
+# Fire incidents merged from active fire detections; new detections stream in
+# through /api/incidents/detections. With several gunicorn workers, set
+# ECOSENTRY_INCIDENTS_DIR to a directory they share (cleared on deploy) so
+# every worker sees the same detections and incident ids.
+incident_tracker = data_processor.cluster_active_fires()
+if os.environ.get('ECOSENTRY_INCIDENTS_DIR'):
+    incident_tracker = SharedIncidentTracker(
+        incident_tracker, os.path.join(os.environ['ECOSENTRY_INCIDENTS_DIR'], 'detections.jsonl')
+    )
+
+# Latest grid-wide risk nowcast, produced by `python -m models.nowcast`
+risk_raster = RiskRaster(os.environ.get('ECOSENTRY_NOWCAST_DIR', os.path.join('data', 'nowcast')))
+
+# Optional always-on sampling profiler, served at /debug/profile
+profiler = None
+if os.environ.get('ECOSENTRY_PROFILER'):
+    profiler = monitoring.SamplingProfiler(float(os.environ.get('ECOSENTRY_PROFILER_INTERVAL', 0.01)))
+    profiler.start()
+
+@app.before_request
+def start_request_timer():
+    """Record the start time of API requests"""
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_duration(response):
+    """Feed API request durations into the endpoint latency histogram"""
+    if request.endpoint and request.path.startswith('/api/'):
+        monitoring.registry.observe(
+            'ecosentry_request_duration_seconds', 'endpoint', request.endpoint,
+            time.perf_counter() - g.request_start
+        )
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Expose latency histograms in the Prometheus text format"""
+    return Response(monitoring.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/debug/profile')
+def profile():
+    """Return the sampling profile in collapsed-stack (flame graph) format"""
+    if profiler is None:
+        return jsonify({'error': 'Profiler is disabled; set ECOSENTRY_PROFILER=1'}), 404
+    
+    return Response(profiler.collapsed(), mimetype='text/plain')
 
 @app.route('/')
 def home():
@@ -45,7 +126,7 @@ def predict_risk():
     wind_speed = weather.get('windSpeed')
     precipitation = weather.get('precipitation')
     
-    # Create feature vector
+    # Create feature vector; missing weather is filled from the weather store
     features = {
         'latitude': latitude,
         'longitude': longitude,
@@ -53,7 +134,7 @@ def predict_risk():
         'humidity': humidity,
         'wind_speed': wind_speed,
         'precipitation': precipitation,
-        'date': datetime.now().strftime('%Y-%m-%d')
+        'date': data.get('date', datetime.now().strftime('%Y-%m-%d'))
     }
     
     # Make prediction
@@ -65,22 +146,123 @@ def predict_risk():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_risk_batch():
+    """API endpoint to predict fire risk for many locations in one request"""
+    try:
+        data = read_body()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Columns of equal length; missing weather is filled from the weather store
+    try:
+        columns = {
+            name: np.atleast_1d(np.asarray(data[name], dtype=np.float64))
+            for name in ('latitude', 'longitude', 'temperature', 'humidity', 'wind_speed', 'precipitation')
+            if data.get(name) is not None
+        }
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid column: {e}'}), 400
+    if 'latitude' not in columns or 'longitude' not in columns:
+        return jsonify({'error': 'latitude and longitude columns are required'}), 400
+    if any(values.ndim != 1 for values in columns.values()):
+        return jsonify({'error': 'Columns must be one-dimensional arrays'}), 400
+    if len({len(values) for values in columns.values()}) != 1:
+        return jsonify({'error': 'All columns must have the same length'}), 400
+    
+    risk_scores = fire_predictor.predict_batch(columns, date=data.get('date'))
+    
+    return respond(
+        lambda: {'risk_scores': risk_scores.tolist(), 'timestamp': datetime.now().isoformat()},
+        columns={'lat': columns['latitude'], 'lng': columns['longitude'], 'score': risk_scores}
+    )
+
 @app.route('/api/detect', methods=['POST'])
 def detect_fire():
     """API endpoint to detect fires in satellite imagery"""
     if 'image' not in request.files:
         return jsonify({'error': 'No image provided'}), 400
         
-    image_file = request.files['image']
+    image_files = request.files.getlist('image')
     
-    # Process image and make detection
-    detection_results = fire_detector.detect(image_file)
+    # Process images and make detections in one batch; a single upload
+    # returns a single result as before
+    try:
+        detection_results = fire_detector.detect_batch(image_files)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if len(detection_results) == 1:
+        detection_results = detection_results[0]
     
     return jsonify({
         'detections': detection_results,
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/detect/spectral', methods=['POST'])
+def detect_fire_spectral():
+    """
+    API endpoint to detect fires in multispectral tiles sent as NumPy arrays.
+    
+    The body is a .npy file, or raw pixels when the `shape` and `dtype` query
+    parameters describe them. Optional query parameters: `bands` (comma-separated
+    band indices in model input order), `scale` (normalization divisor) and
+    `layout` ('hwc' or 'chw').
+    """
+    buffer = request.files['array'].read() if 'array' in request.files else request.get_data()
+    if not buffer:
+        return jsonify({'error': 'No array provided'}), 400
+    
+    try:
+        with monitoring.timed('decode'):
+            if request.args.get('shape'):
+                shape = [int(dim) for dim in request.args['shape'].split(',')]
+                array = read_raw_buffer(buffer, shape, request.args.get('dtype', 'float32'))
+            else:
+                array = read_npy_buffer(buffer)
+        
+        bands = request.args.get('bands')
+        detection_result = fire_detector.detect_array(
+            array,
+            bands=[int(band) for band in bands.split(',')] if bands else None,
+            scale=request.args.get('scale', type=float),
+            channels_first=request.args.get('layout', 'hwc') == 'chw'
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'detections': detection_result,
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/detect/stream', methods=['POST'])
+def detect_fire_stream():
+    """API endpoint to detect fires across a video or sequence of frames"""
+    if 'video' in request.files:
+        frames = iter_video_frames(request.files['video'])
+    elif 'frames' in request.files:
+        frames = iter_image_frames(request.files.getlist('frames'), fps=request.form.get('fps', 1.0, type=float))
+    else:
+        return jsonify({'error': 'No video or frames provided'}), 400
+    
+    stream_detector = StreamDetector(
+        fire_detector,
+        diff_threshold=request.form.get('diffThreshold', 0.02, type=float),
+        batch_size=request.form.get('batchSize', 16, type=int)
+    )
+    
+    try:
+        result = stream_detector.run(frames)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'track': result['track'],
+        'stats': result['stats'],
+        'timestamp': datetime.now().isoformat()
+    })
+
 @app.route('/api/resources', methods=['POST'])
 def optimize_resources():
     """API endpoint to recommend resource allocation"""
@@ -118,6 +300,154 @@ def optimize_resources():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/risk-zones')
+def get_risk_zones():
+    """API endpoint returning the risk areas as GeoJSON polygons"""
+    return jsonify(data_processor.get_risk_areas_geojson())
+
+@app.route('/api/risk-zones/classify', methods=['POST'])
+def classify_risk_zones():
+    """API endpoint to assign points (e.g. detections) to risk areas"""
+    data = request.get_json(force=True, silent=True) or {}
+    
+    try:
+        points = np.asarray(data.get('points', []), dtype=np.float64).reshape(-1, 2)
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({'error': 'points must be a list of [lat, lng] pairs'}), 400
+    zones = data_processor.assign_risk_areas(points[:, 0], points[:, 1])
+    
+    area_ids = [area.get('id') for area in data_processor.risk_data or []]
+    
+    return jsonify({
+        'risk_area_ids': [area_ids[zone] if zone >= 0 else None for zone in zones.tolist()],
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/incidents')
+def get_incidents():
+    """API endpoint listing fire incidents merged from active fire detections"""
+    active_only = request.args.get('all', '0') != '1'
+    return jsonify({
+        'incidents': incident_tracker.incidents(active_only=active_only),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/incidents/detections', methods=['POST'])
+def add_detections():
+    """API endpoint to stream new fire detections into incidents"""
+    detections = (request.json or {}).get('detections', [])
+    
+    try:
+        incidents = incident_tracker.update(
+            [detection['lat'] for detection in detections],
+            [detection['lng'] for detection in detections],
+            [detection.get('time', datetime.now().isoformat(timespec='seconds')) for detection in detections],
+            [detection.get('intensity', 0) for detection in detections],
+            [detection.get('name') for detection in detections]
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid detections: {e}'}), 400
+    
+    return jsonify({
+        'incident_ids': incidents.tolist(),
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/simulate', methods=['POST'])
+def simulate_spread():
+    """API endpoint to simulate the spread of an active fire"""
+    data = request.get_json(force=True, silent=True) or {}
+    
+    # Start from a known active fire or an arbitrary ignition point
+    fire_id = data.get('fire_id')
+    if fire_id is not None:
+        fire = next((fire for fire in data_processor.active_fires or [] if fire.get('id') == fire_id), None)
+        if fire is None:
+            return jsonify({'error': f'Unknown active fire: {fire_id}'}), 404
+        location = fire['location']
+        # area_burned is in hectares; treat it as a burning disk
+        initial_radius = np.sqrt(fire.get('area_burned', 0) * 10000 / np.pi)
+    else:
+        location = data.get('location', {})
+        # Without a radius the fire starts from the single cell at the location
+        initial_radius = data.get('initialRadius')
+        if initial_radius is not None:
+            try:
+                initial_radius = float(initial_radius)
+            except (TypeError, ValueError):
+                initial_radius = float('nan')
+            if not initial_radius > 0:
+                return jsonify({'error': 'initialRadius must be a positive number of meters'}), 400
+    
+    if location.get('lat') is None or location.get('lng') is None:
+        return jsonify({'error': 'No fire_id or location provided'}), 400
+    
+    weather = data.get('weather', {})
+    simulation_weather = {
+        'humidity': weather.get('humidity', 50),
+        'precipitation': weather.get('precipitation', 0),
+        'wind_speed': weather.get('windSpeed', 5),
+        'wind_direction': weather.get('windDirection', 0)
+    }
+    
+    try:
+        result = spread_simulator.simulate(
+            location['lat'],
+            location['lng'],
+            weather=simulation_weather,
+            steps=min(int(data.get('steps', 50)), 500),
+            members=min(int(data.get('members', 20)), 200),
+            initial_radius=initial_radius,
+            seed=data.get('seed')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid simulation parameters: {e}'}), 400
+    
+    return jsonify({
+        'burn_probability': spread_simulator.to_points(result),
+        'stats': result['stats'],
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/nowcast')
+def nowcast_info():
+    """API endpoint describing the latest risk nowcast cycle"""
+    if not risk_raster.refresh():
+        return jsonify({'error': 'No nowcast available'}), 404
+    
+    return jsonify(risk_raster.metadata)
+
+@app.route('/api/nowcast/point')
+def nowcast_point():
+    """API endpoint to look up nowcast risk at a location"""
+    lat = request.args.get('lat', type=float)
+    lng = request.args.get('lng', type=float)
+    if lat is None or lng is None:
+        return jsonify({'error': 'lat and lng are required'}), 400
+    
+    if not risk_raster.refresh():
+        return jsonify({'error': 'No nowcast available'}), 404
+    
+    return jsonify({
+        'risk_score': risk_raster.value_at(lat, lng),
+        'cycle': risk_raster.metadata['cycle'],
+        'timestamp': datetime.now().isoformat()
+    })
+
+@app.route('/api/nowcast/tiles/<int:z>/<int:x>/<int:y>.png')
+def nowcast_tile(z, x, y):
+    """Serve a map tile rendered from the latest risk nowcast"""
+    if not risk_raster.refresh():
+        return jsonify({'error': 'No nowcast available'}), 404
+    
+    tile = risk_raster.render_tile(z, x, y)
+    
+    buffer = io.BytesIO()
+    Image.fromarray(tile, 'RGBA').save(buffer, format='PNG')
+    buffer.seek(0)
+    
+    return send_file(buffer, mimetype='image/png')
+
 @app.route('/api/sample-data')
 def get_sample_data():
     """Provide sample data for demonstration purposes"""
@@ -125,7 +455,21 @@ def get_sample_data():
     with open(os.path.join('data', 'sample_data', 'risk_data.json'), 'r') as f:
         risk_data = json.load(f)
     
-    return jsonify(risk_data)
+    # JSON by default; MessagePack when requested
+    return respond(risk_data)
+
+@app.route('/api/heatmap')
+def get_heatmap():
+    """API endpoint providing risk heatmap points as JSON, MessagePack or packed float32 columns"""
+    columns = data_processor.generate_risk_heatmap_columns()
+    
+    return respond(
+        lambda: {
+            'points': np.column_stack([columns['lat'], columns['lng'], columns['intensity']]).tolist(),
+            'timestamp': datetime.now().isoformat()
+        },
+        columns=columns
+    )
 
 if __name__ == '__main__':
     # Make sure sample data directory exists
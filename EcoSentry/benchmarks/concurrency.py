@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+import argparse
+import threading
+
+# Benchmarks import the models relative to the project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from benchmarks import fixtures
+
+
+def _predictor_workload(requests):
+    """Build (call, inputs) for single-point risk predictions"""
+    from models.fire_predictor import FireRiskPredictor
+    predictor = FireRiskPredictor()
+    columns = fixtures.weather_columns(requests)
+    inputs = [
+        {name: float(values[i]) for name, values in columns.items()}
+        for i in range(requests)
+    ]
+    return lambda data: predictor.predict(data), inputs
+
+
+def _detector_workload(requests, model_path=None):
+    """Build (call, inputs) for single-image detections"""
+    from models.fire_detector import FireDetector
+    detector = FireDetector(model_path)
+    inputs = [fixtures.image_bytes(224, seed=i % 16) for i in range(requests)]
+    return detector.detect, inputs
+
+
+def stress(call, inputs, threads):
+    """
+    Run call over inputs from several threads at once
+
+    Returns:
+        tuple: (results in input order, elapsed seconds)
+    """
+    results = [None] * len(inputs)
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def worker(offset):
+        barrier.wait()
+        try:
+            for i in range(offset, len(inputs), threads):
+                results[i] = call(inputs[i])
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if errors:
+        raise errors[0]
+    return results, elapsed
+
+
+def _same(expected, actual):
+    """Compare results, allowing float rounding differences"""
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(_same(expected[k], actual[k]) for k in expected)
+    if isinstance(expected, (list, tuple)):
+        return len(expected) == len(actual) and all(_same(e, a) for e, a in zip(expected, actual))
+    if isinstance(expected, float):
+        return abs(expected - actual) <= 1e-5
+    return expected == actual
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrency stress test for the shared predictor and detector')
+    parser.add_argument('--workload', choices=['predictor', 'detector'], default='predictor')
+    parser.add_argument('--model', default=None, help='Detector model path (e.g. a .tflite file)')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--max-threads', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--min-speedup', type=float, default=None,
+                        help='Fail unless the best multi-thread throughput is at least this many times '
+                             'the single-thread throughput (for CI; needs 2 or more CPUs)')
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    if args.min_speedup is not None and min(cpus, args.max_threads) < 2:
+        print(f"--min-speedup needs at least 2 CPUs and threads to measure scaling (have {cpus} CPUs, "
+              f"--max-threads {args.max_threads})")
+        return 1
+
+    if args.workload == 'predictor':
+        call, inputs = _predictor_workload(args.requests)
+    else:
+        call, inputs = _detector_workload(args.requests, args.model)
+
+    # Single-threaded reference results, after one warm-up call
+    call(inputs[0])
+    expected, baseline = stress(call, inputs, 1)
+    print(f"{'threads':>8} {'req/s':>10} {'speedup':>8} {'efficiency':>10}  results")
+
+    failed = False
+    best_speedup = 1.0
+    threads = 1
+    while threads <= args.max_threads:
+        results, elapsed = stress(call, inputs, threads)
+        correct = all(_same(e, a) for e, a in zip(expected, results))
+        failed |= not correct
+        speedup = baseline / elapsed
+        if threads > 1:
+            best_speedup = max(best_speedup, speedup)
+        print(f"{threads:>8} {len(inputs) / elapsed:>10.1f} {speedup:>8.2f} {speedup / threads:>10.0%}  "
+              f"{'ok' if correct else 'MISMATCH'}")
+        threads *= 2
+
+    if args.min_speedup is not None and best_speedup < args.min_speedup:
+        print(f"FAIL: best speedup {best_speedup:.2f}x is below --min-speedup {args.min_speedup:.2f}x")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
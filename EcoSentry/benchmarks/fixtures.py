@@ -0,0 +1,201 @@
+import numpy as np
+import json
+import os
+import io
+from PIL import Image
+
+# Rough bounding box of the western US, where the sample data lives
+LAT_RANGE = (32.5, 42.0)
+LNG_RANGE = (-124.5, -114.0)
+
+
+def weather_columns(size, seed=0):
+    """
+    Generate synthetic column data for FireRiskPredictor.predict_batch
+
+    Returns:
+        dict: Feature name to array of length size
+    """
+    rng = np.random.default_rng(seed)
+    return {
+        'latitude': rng.uniform(*LAT_RANGE, size),
+        'longitude': rng.uniform(*LNG_RANGE, size),
+        'temperature': rng.uniform(10, 40, size),
+        'humidity': rng.uniform(5, 90, size),
+        'wind_speed': rng.uniform(0, 40, size),
+        'precipitation': rng.exponential(2, size)
+    }
+
+
+def write_weather_grid(directory, times=24, shape=(1000, 1100), seed=0):
+    """
+    Write an hourly gridded forecast over LAT_RANGE x LNG_RANGE in the
+    WeatherStore.load layout
+
+    Returns:
+        str: The directory
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    header = {
+        'bounds': {'north': LAT_RANGE[1], 'south': LAT_RANGE[0], 'west': LNG_RANGE[0], 'east': LNG_RANGE[1]},
+        'times': [f'2025-07-01T{hour:02d}:00' for hour in range(times)]
+    }
+    with open(os.path.join(directory, 'grid.json'), 'w') as f:
+        json.dump(header, f)
+
+    ranges = {'temperature': (10, 40), 'humidity': (5, 90), 'wind_speed': (0, 40), 'precipitation': (0, 5)}
+    for name, (low, high) in ranges.items():
+        array = np.lib.format.open_memmap(os.path.join(directory, f'{name}.npy'), mode='w+',
+                                          dtype=np.float32, shape=(times,) + shape)
+        for t in range(times):
+            array[t] = rng.uniform(low, high, shape)
+        array.flush()
+    return directory
+
+
+def predict_payload(seed=0):
+    """Generate a single /api/predict request body"""
+    rng = np.random.default_rng(seed)
+    return {
+        'location': {'lat': float(rng.uniform(*LAT_RANGE)), 'lng': float(rng.uniform(*LNG_RANGE))},
+        'weather': {
+            'temperature': float(rng.uniform(10, 40)),
+            'humidity': float(rng.uniform(5, 90)),
+            'windSpeed': float(rng.uniform(0, 40)),
+            'precipitation': float(rng.exponential(2))
+        }
+    }
+
+
+def image_bytes(size, seed=0):
+    """Generate a random PNG image of size x size pixels"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, 'RGB').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def image_batch(batch_size, size=224, seed=0):
+    """Generate a batch of preprocessed float32 images in [0, 1]"""
+    rng = np.random.default_rng(seed)
+    return rng.random((batch_size, size, size, 3), dtype=np.float32)
+
+
+def write_spectral_tile(path, size, bands=12, seed=0):
+    """Write a size x size uint16 reflectance tile with the given band count as .npy"""
+    rng = np.random.default_rng(seed)
+    tile = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint16, shape=(size, size, bands))
+    for start in range(0, size, 256):
+        rows = tile[start:start + 256]
+        rows[...] = rng.integers(0, 10000, rows.shape, dtype=np.uint16)
+    tile.flush()
+    return path
+
+
+def frame_sequence(frames, change_every, size=(320, 240), seed=0):
+    """
+    Generate (timestamp, PIL image) video frames at 10 fps with sensor noise,
+    where the scene changes every change_every frames
+
+    Returns:
+        list: Frames in order
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    sequence = []
+    for index in range(frames):
+        scene = index // change_every
+        pixels = np.full((height, width, 3), 40, dtype=np.int16)
+        top = (scene * 37) % (height - 60)
+        left = (scene * 53) % (width - 80)
+        pixels[top:top + 60, left:left + 80] = (255, 120, 0)
+        pixels += rng.integers(-3, 4, pixels.shape, dtype=np.int16)
+        sequence.append((index / 10.0, Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))))
+    return sequence
+
+
+def risk_data(records, seed=0):
+    """
+    Generate a risk_data.json document with the given number of records
+    in each of risk_areas, active_fires and historical_fires
+
+    Returns:
+        dict: Document in the same layout as data/sample_data/risk_data.json
+    """
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(*LAT_RANGE, records).round(4)
+    lngs = rng.uniform(*LNG_RANGE, records).round(4)
+    scores = rng.uniform(0, 1, records).round(2)
+
+    region_names = [f'Region {i}' for i in range(records)]
+    risk_areas = [
+        {
+            'id': i,
+            'name': region_names[i],
+            'center': {'lat': lats[i], 'lng': lngs[i]},
+            'radius': int(rng.integers(5000, 50000)),
+            'risk_score': scores[i],
+            'risk_factors': ['High temperature', 'Low humidity']
+        }
+        for i in range(records)
+    ]
+    active_fires = [
+        {
+            'id': 100000000 + i,
+            'name': f'Fire {i}',
+            'location': {'lat': lats[i], 'lng': lngs[i]},
+            'intensity': scores[i],
+            'area_burned': int(rng.integers(10, 5000)),
+            'started': '2025-05-24',
+            'status': 'Uncontained'
+        }
+        for i in range(records)
+    ]
+    historical_fires = [
+        {
+            'id': 200000000 + i,
+            'name': f'Historical Fire {i}',
+            'year': int(rng.integers(2000, 2025)),
+            'location': {'lat': lats[i], 'lng': lngs[i]},
+            'area_burned': int(rng.integers(100, 50000)),
+            'duration_days': int(rng.integers(1, 60))
+        }
+        for i in range(records)
+    ]
+    forecast_regions = {
+        name: {'temperature': 30.0, 'humidity': 25, 'wind_speed': 16, 'precipitation': 0}
+        for name in region_names[:1000]
+    }
+
+    return {
+        'risk_areas': risk_areas,
+        'active_fires': active_fires,
+        'historical_fires': historical_fires,
+        'resources': [],
+        'weather_data': {'current': {}, 'forecast': [{'date': '2025-05-26', 'regions': forecast_regions}]}
+    }
+
+
+def detections(count, fires=2000, hours=24, seed=0):
+    """
+    Generate time-ordered fire detections scattered around a set of fires
+
+    Returns:
+        tuple: (latitudes, longitudes, datetime64 times) arrays
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform((LAT_RANGE[0], LNG_RANGE[0]), (LAT_RANGE[1], LNG_RANGE[1]), (fires, 2))
+    points = centers[rng.integers(0, fires, count)] + rng.normal(0, 0.005, (count, 2))
+    offsets = np.sort(rng.integers(0, hours * 3600, count)).astype('timedelta64[s]')
+    return points[:, 0], points[:, 1], np.datetime64('2025-07-01T00:00') + offsets
+
+
+def write_risk_data(directory, records, seed=0):
+    """Write a synthetic risk_data.json into directory and return its path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'risk_data.json')
+    with open(path, 'w') as f:
+        json.dump(risk_data(records, seed), f, default=float)
+    return path
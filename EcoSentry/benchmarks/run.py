@@ -0,0 +1,162 @@
+import numpy as np
+import json
+import os
+import sys
+import time
+import fnmatch
+import platform
+import argparse
+from datetime import datetime
+
+# Benchmarks import the app and models relative to the project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from benchmarks.suite import BENCHMARKS, RECORD_COUNTS, Rounds
+
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+
+
+def measure(func, min_rounds=5, min_time=0.5, max_time=10.0):
+    """
+    Time repeated calls of func after one warm-up call
+
+    Runs at least min_rounds calls or min_time seconds, whichever takes
+    longer, but stops after max_time seconds (always at least one call).
+    For Rounds, only run(state) is timed; setup() builds state untimed
+    before every call.
+
+    Returns:
+        dict: Timing statistics in seconds
+    """
+    if isinstance(func, Rounds):
+        setup, run_round = func
+    else:
+        setup, run_round = (lambda: None), (lambda state: func())
+    run_round(setup())
+
+    timings = []
+    started = time.perf_counter()
+    while True:
+        state = setup()
+        start = time.perf_counter()
+        run_round(state)
+        timings.append(time.perf_counter() - start)
+
+        elapsed = time.perf_counter() - started
+        if elapsed >= max_time or (len(timings) >= min_rounds and elapsed >= min_time):
+            break
+
+    timings = np.array(timings)
+    return {
+        'min': float(timings.min()),
+        'median': float(np.median(timings)),
+        'mean': float(timings.mean()),
+        'stddev': float(timings.std()),
+        'rounds': len(timings)
+    }
+
+
+def run(pattern='*', max_records=100000, **measure_options):
+    """
+    Run all benchmarks whose name matches pattern
+
+    Returns:
+        dict: Results keyed by 'name[param]'
+    """
+    results = {}
+    for bench in BENCHMARKS:
+        if not fnmatch.fnmatch(bench.name, pattern):
+            continue
+        for param in bench.params:
+            if bench.params == RECORD_COUNTS and param > max_records:
+                continue
+
+            key = bench.name if param is None else f'{bench.name}[{param}]'
+            stats = measure(bench.setup(param), **measure_options)
+            results[key] = stats
+            print(f"{key:<40} median {stats['median'] * 1000:10.3f} ms  "
+                  f"min {stats['min'] * 1000:10.3f} ms  ({stats['rounds']} rounds)")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare median timings against a baseline
+
+    Returns:
+        list: (key, baseline median, current median) for each regression
+    """
+    regressions = []
+    for key, stats in results.items():
+        if key not in baseline:
+            continue
+        previous = baseline[key]['median']
+        if stats['median'] > previous * (1 + tolerance):
+            regressions.append((key, previous, stats['median']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the EcoSentry benchmark suite')
+    parser.add_argument('-k', '--filter', default='*', help='Glob of benchmark names to run')
+    parser.add_argument('--max-records', type=int, default=100000,
+                        help='Largest data processor record count to run (up to 1000000)')
+    parser.add_argument('--output', default=None, help='Write results to this JSON file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='Fail when there is no baseline to compare against (for CI)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown of the median before failing (0.25 = 25%%)')
+    parser.add_argument('--min-rounds', type=int, default=5)
+    parser.add_argument('--max-time', type=float, default=10.0, help='Time budget per benchmark in seconds')
+    args = parser.parse_args()
+
+    results = run(args.filter, args.max_records, min_rounds=args.min_rounds, max_time=args.max_time)
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count()
+        },
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 1 if args.require_baseline else 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)['results']
+
+    regressions = compare(results, baseline, args.tolerance)
+    for key, previous, current in regressions:
+        print(f"REGRESSION {key}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms "
+              f"({(current / previous - 1) * 100:+.1f}%)")
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+import tempfile
+import os
+import shutil
+import atexit
+import functools
+from collections import namedtuple
+from benchmarks import fixtures
+
+# A benchmark's setup(param) returns the zero-argument callable to time, or
+# Rounds when each round needs fresh state: setup() runs untimed before every
+# round and its result is passed to the timed run(state)
+Benchmark = namedtuple('Benchmark', ['name', 'params', 'setup'])
+Rounds = namedtuple('Rounds', ['setup', 'run'])
+
+BENCHMARKS = []
+
+# Record counts for data processor benchmarks
+RECORD_COUNTS = (1000, 10000, 100000, 1000000)
+
+
+def benchmark(name, params=(None,)):
+    """Register a benchmark setup function for each of params"""
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, tuple(params), setup))
+        return setup
+    return decorator
+
+
+@functools.lru_cache(maxsize=None)
+def _predictor():
+    from models.fire_predictor import FireRiskPredictor
+    return FireRiskPredictor()
+
+
+@functools.lru_cache(maxsize=None)
+def _detector():
+    from models.fire_detector import FireDetector
+    return FireDetector()
+
+
+@functools.lru_cache(maxsize=None)
+def _client():
+    from app import app
+    return app.test_client()
+
+
+@functools.lru_cache(maxsize=None)
+def _data_dir(records):
+    directory = tempfile.mkdtemp(prefix=f'ecosentry-bench-{records}-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    fixtures.write_risk_data(directory, records)
+    return directory
+
+
+@functools.lru_cache(maxsize=None)
+def _processor(records):
+    from data.data_processor import FireDataProcessor
+    return FireDataProcessor(data_dir=_data_dir(records))
+
+
+# Predictor
+
+@benchmark('predictor.predict')
+def bench_predict(param):
+    predictor = _predictor()
+    data = {
+        'latitude': 37.77, 'longitude': -122.42, 'temperature': 32, 'humidity': 20,
+        'wind_speed': 15, 'precipitation': 0, 'date': '2025-07-01'
+    }
+    return lambda: predictor.predict(data)
+
+
+@benchmark('predictor.predict_batch', params=(1, 100, 10000, 100000))
+def bench_predict_batch(size):
+    predictor = _predictor()
+    data = fixtures.weather_columns(size)
+    return lambda: predictor.predict_batch(data, date='2025-07-01')
+
+
+@benchmark('predictor.predict_batch_weather_store', params=(100, 10000, 100000))
+def bench_predict_batch_weather_store(size):
+    from models.fire_predictor import FireRiskPredictor
+    from data.weather_store import WeatherStore
+    directory = tempfile.mkdtemp(prefix='ecosentry-bench-weather-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    fixtures.write_weather_grid(directory)
+    predictor = FireRiskPredictor(weather_store=WeatherStore.load(directory))
+    columns = fixtures.weather_columns(size)
+    data = {'latitude': columns['latitude'], 'longitude': columns['longitude']}
+    return lambda: predictor.predict_batch(data, date='2025-07-01T06:00')
+
+
+# Detector
+
+@benchmark('detector.detect', params=(224, 512, 1024, 2048))
+def bench_detect(size):
+    detector = _detector()
+    image = fixtures.image_bytes(size)
+    return lambda: detector.detect(image)
+
+
+@benchmark('detector.classify', params=(1, 8, 32))
+def bench_classify(batch_size):
+    detector = _detector()
+    images = fixtures.image_batch(batch_size)
+    return lambda: detector.classify(images, saliency=False)
+
+
+@benchmark('detector.classify_saliency', params=(1, 8, 32))
+def bench_classify_saliency(batch_size):
+    detector = _detector()
+    images = fixtures.image_batch(batch_size)
+    return lambda: detector.classify(images, saliency=True)
+
+
+@benchmark('detector.detect_array', params=(1024, 4096))
+def bench_detect_array(size):
+    from models.spectral import open_array
+    directory = tempfile.mkdtemp(prefix='ecosentry-bench-tile-')
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = os.path.join(directory, 'tile.npy')
+    fixtures.write_spectral_tile(path, size)
+    detector = _detector()
+    tile = open_array(path)
+    return lambda: detector.detect_array(tile, bands=[11, 7, 3], scale=10000)
+
+
+@benchmark('detector.stream', params=(1, 10, 100))
+def bench_stream(change_every):
+    from models.stream_detector import StreamDetector
+    stream_detector = StreamDetector(_detector())
+    frames = fixtures.frame_sequence(100, change_every)
+    return lambda: stream_detector.run(iter(frames))
+
+
+@functools.lru_cache(maxsize=None)
+def _tflite_detector(quantization):
+    from models.fire_detector import FireDetector
+    path = os.path.join(tempfile.mkdtemp(prefix='ecosentry-bench-tflite-'), 'detector.tflite')
+    atexit.register(shutil.rmtree, os.path.dirname(path), ignore_errors=True)
+    _detector().export(path, quantization)
+    return FireDetector(path)
+
+
+@benchmark('detector.detect_tflite', params=(224, 1024))
+def bench_detect_tflite(size):
+    detector = _tflite_detector(None)
+    image = fixtures.image_bytes(size)
+    return lambda: detector.detect(image)
+
+
+@benchmark('detector.detect_tflite_int8', params=(224, 1024))
+def bench_detect_tflite_int8(size):
+    detector = _tflite_detector('int8')
+    image = fixtures.image_bytes(size)
+    return lambda: detector.detect(image)
+
+
+# Data processor
+
+@benchmark('data_processor.load', params=RECORD_COUNTS)
+def bench_load(records):
+    from data.data_processor import FireDataProcessor
+    directory = _data_dir(records)
+    return lambda: FireDataProcessor(data_dir=directory)
+
+
+@benchmark('data_processor.dataframes', params=RECORD_COUNTS)
+def bench_dataframes(records):
+    processor = _processor(records)
+
+    def run():
+        processor.get_risk_dataframe()
+        processor.get_fire_history_dataframe()
+        processor.get_active_fires_dataframe()
+    return run
+
+
+@benchmark('data_processor.heatmap', params=RECORD_COUNTS)
+def bench_heatmap(records):
+    processor = _processor(records)
+    return processor.generate_risk_heatmap_data
+
+
+@benchmark('data_processor.assign_risk_areas', params=(10000, 1000000))
+def bench_assign_risk_areas(points):
+    processor = _processor(1000)
+    processor.get_risk_zones()
+    columns = fixtures.weather_columns(points)
+    return lambda: processor.assign_risk_areas(columns['latitude'], columns['longitude'])
+
+
+@benchmark('data_processor.trends', params=RECORD_COUNTS)
+def bench_trends(records):
+    processor = _processor(records)
+    return lambda: processor.predict_risk_trends(days=7)
+
+
+@benchmark('data_processor.report', params=RECORD_COUNTS)
+def bench_report(records):
+    processor = _processor(records)
+    return processor.generate_demo_report
+
+
+# Incidents
+
+@benchmark('incidents.cluster', params=(10000, 100000))
+def bench_incidents_cluster(count):
+    from data.incidents import IncidentTracker
+    lats, lngs, times = fixtures.detections(count)
+    return lambda: IncidentTracker().update(lats, lngs, times)
+
+
+@benchmark('incidents.stream', params=(10, 100, 1000))
+def bench_incidents_stream(batch):
+    from data.incidents import IncidentTracker
+    # Stream one batch on top of a day of detections already being tracked;
+    # every round starts from the same history so rounds time the same update
+    lats, lngs, times = fixtures.detections(100000 + batch)
+
+    def preload():
+        tracker = IncidentTracker()
+        tracker.update(lats[:100000], lngs[:100000], times[:100000])
+        return tracker
+
+    return Rounds(preload, lambda tracker: tracker.update(lats[100000:], lngs[100000:], times[100000:]))
+
+
+# HTTP endpoints
+
+@benchmark('http.predict')
+def bench_http_predict(param):
+    client = _client()
+    payload = fixtures.predict_payload()
+    return lambda: client.post('/api/predict', json=payload)
+
+
+@benchmark('http.detect', params=(224, 1024))
+def bench_http_detect(size):
+    import io
+    client = _client()
+    image = fixtures.image_bytes(size)
+    return lambda: client.post('/api/detect', data={'image': (io.BytesIO(image), 'image.png')})
+
+
+@benchmark('http.resources', params=(10, 1000))
+def bench_http_resources(areas):
+    client = _client()
+    payload = {
+        'risk_areas': [
+            {'id': i, 'name': f'Region {i}', 'risk_score': (i % 100) / 100} for i in range(areas)
+        ],
+        'available_resources': {'firefighters': 500, 'trucks': 40, 'helicopters': 6}
+    }
+    return lambda: client.post('/api/resources', json=payload)
+
+
+@benchmark('http.sample_data')
+def bench_http_sample_data(param):
+    client = _client()
+    return lambda: client.get('/api/sample-data')
+
+
+# Accept headers for each response format
+ACCEPT = {
+    'json': 'application/json',
+    'msgpack': 'application/msgpack',
+    'columns': 'application/vnd.ecosentry.columns'
+}
+
+
+@benchmark('http.heatmap', params=tuple(ACCEPT))
+def bench_http_heatmap(response_format):
+    import app
+    client = _client()
+    # Serve a heatmap of 1000 risk areas (~55k points) from a separate
+    # processor, swapped in only for the request so later benchmarks still
+    # see the app's own data
+    processor = _processor(1000)
+    headers = {'Accept': ACCEPT[response_format]}
+
+    def request():
+        original = app.data_processor
+        app.data_processor = processor
+        try:
+            return client.get('/api/heatmap', headers=headers)
+        finally:
+            app.data_processor = original
+
+    return request
+
+
+@benchmark('http.predict_batch', params=tuple(ACCEPT))
+def bench_http_predict_batch(response_format):
+    from serialization import pack_columns
+    client = _client()
+    columns = fixtures.weather_columns(10000)
+    body = pack_columns(columns, date='2025-07-01')
+    headers = {'Accept': ACCEPT[response_format]}
+    return lambda: client.post('/api/predict/batch', data=body, headers=headers,
+                               content_type='application/vnd.ecosentry.columns')
+
+
+@benchmark('http.simulate')
+def bench_http_simulate(param):
+    client = _client()
+    payload = {'fire_id': 101, 'weather': {'windSpeed': 20, 'windDirection': 270}, 'seed': 1}
+    return lambda: client.post('/api/simulate', json=payload)
@@ -4,6 +4,9 @@ import json
 import os
 from datetime import datetime, timedelta
 import logging
+from data.weather_store import WeatherStore
+from data.risk_zones import RiskZones, destination_points
+from data.incidents import IncidentTracker
 
 # Configure logging
 logging.basicConfig(
@@ -29,6 +32,8 @@ class FireDataProcessor:
         self.risk_data = None
         self.historical_fires = None
         self.weather_data = None
+        self.active_fires = None
+        self._risk_zones = None
         
         # Load data if available
         self._load_data()
@@ -131,6 +136,38 @@ class FireDataProcessor:
             
         return pd.DataFrame(data)
     
+    def cluster_active_fires(self, tracker=None, **kwargs):
+        """
+        Merge active fire detections into incidents, in detection order.
+        
+        Args:
+            tracker: IncidentTracker to feed (a new one if None), so later
+                detections can keep streaming into the same incidents
+            **kwargs: Distance and time window passed to a new IncidentTracker
+            
+        Returns:
+            IncidentTracker: Tracker holding the incidents
+        """
+        tracker = tracker or IncidentTracker(**kwargs)
+        
+        detections = [
+            fire for fire in (self.active_fires or [])
+            if fire.get('location') and (fire.get('detected_at') or fire.get('started'))
+        ]
+        if not detections:
+            return tracker
+            
+        times = np.array([fire.get('detected_at') or fire['started'] for fire in detections], dtype='datetime64[s]')
+        order = np.argsort(times, kind='stable')
+        tracker.update(
+            np.array([fire['location']['lat'] for fire in detections])[order],
+            np.array([fire['location']['lng'] for fire in detections])[order],
+            times[order],
+            np.array([fire.get('intensity') or 0 for fire in detections], dtype=np.float64)[order],
+            [detections[i].get('name') for i in order]
+        )
+        return tracker
+    
     def generate_risk_heatmap_data(self):
         """
         Generate data for a risk heatmap visualization.
@@ -138,35 +175,139 @@ class FireDataProcessor:
         Returns:
             list: List of [lat, lng, intensity] points for heatmap
         """
-        if not self.risk_data:
-            return []
-            
-        heatmap_points = []
+        columns = self.generate_risk_heatmap_columns()
+        return np.column_stack([columns['lat'], columns['lng'], columns['intensity']]).tolist()
+    
+    def generate_risk_heatmap_columns(self):
+        """
+        Generate heatmap points as columns, for compact binary responses.
         
-        # For each risk area, generate points within its radius
-        for area in self.risk_data:
-            center_lat = area.get('center', {}).get('lat')
-            center_lng = area.get('center', {}).get('lng')
-            radius = area.get('radius', 0) / 111000  # Convert meters to rough degrees
+        Returns:
+            dict: 'lat', 'lng' and 'intensity' arrays of equal length
+        """
+        lat_parts, lng_parts, intensity_parts = [], [], []
+        
+        # For each risk area, generate points within its circle or polygon
+        for index, area in enumerate(self.risk_data or []):
             risk = area.get('risk_score', 0)
             
             # Generate more points for higher risk areas
             num_points = int(max(10, risk * 100))
             
-            for _ in range(num_points):
-                # Generate random point within circle
-                angle = np.random.uniform(0, 2 * np.pi)
-                r = radius * np.sqrt(np.random.uniform(0, 1))
-                
-                lat = center_lat + r * np.cos(angle)
-                lng = center_lng + r * np.sin(angle)
-                
-                # Intensity proportional to risk
-                intensity = risk * np.random.uniform(0.7, 1.0)
-                
-                heatmap_points.append([lat, lng, intensity])
-                
-        return heatmap_points
+            if area.get('geometry'):
+                lats, lngs = self._sample_zone(index, num_points)
+            else:
+                # Uniform random points within the circle, offset on the sphere
+                center = area.get('center', {})
+                angles = np.random.uniform(0, 2 * np.pi, num_points)
+                distances = area.get('radius', 0) * np.sqrt(np.random.uniform(0, 1, num_points))
+                lats, lngs = destination_points(center.get('lat'), center.get('lng'), distances, angles)
+            
+            lat_parts.append(lats)
+            lng_parts.append(lngs)
+            # Intensity proportional to risk
+            intensity_parts.append(risk * np.random.uniform(0.7, 1.0, len(lats)))
+            
+        if not lat_parts:
+            return {'lat': np.empty(0), 'lng': np.empty(0), 'intensity': np.empty(0)}
+            
+        return {
+            'lat': np.concatenate(lat_parts),
+            'lng': np.concatenate(lng_parts),
+            'intensity': np.concatenate(intensity_parts)
+        }
+    
+    def _sample_zone(self, index, num_points, max_rounds=20):
+        """
+        Draw uniform random points inside a polygon risk area by rejection
+        sampling from its bounding box
+        
+        Returns:
+            tuple: (latitudes, longitudes) arrays of up to num_points points
+        """
+        zones = self.get_risk_zones()
+        west, south, east, north = zones.bounds[index]
+        lats, lngs = [], []
+        found = 0
+        
+        for _ in range(max_rounds):
+            if found >= num_points:
+                break
+            batch = 2 * (num_points - found) + 16
+            lat = np.random.uniform(south, north, batch)
+            lng = np.random.uniform(west, east, batch)
+            inside = zones.contains(index, lat, lng)
+            lats.append(lat[inside])
+            lngs.append(lng[inside])
+            found += np.count_nonzero(inside)
+            
+        return np.concatenate(lats)[:num_points], np.concatenate(lngs)[:num_points]
+    
+    def get_risk_zones(self):
+        """
+        Get the risk areas as polygon zones for point classification.
+        Circular areas are converted to polygons; areas with a GeoJSON
+        'geometry' (Polygon or MultiPolygon) use it directly.
+        
+        Returns:
+            RiskZones: One zone per risk area, in risk_data order
+        """
+        if self._risk_zones is None:
+            self._risk_zones = RiskZones.from_risk_areas(self.risk_data or [])
+        return self._risk_zones
+    
+    def assign_risk_areas(self, latitudes, longitudes):
+        """
+        Assign points (detections, grid cells, ...) to the risk area containing
+        them. Points in overlapping areas go to the area with the highest risk score.
+        
+        Args:
+            latitudes, longitudes: Arrays of point coordinates
+            
+        Returns:
+            numpy array: Index into the risk areas per point, -1 outside all areas
+        """
+        return self.get_risk_zones().classify(latitudes, longitudes)
+    
+    def get_risk_areas_geojson(self):
+        """
+        Export the risk areas as a GeoJSON FeatureCollection of polygons.
+        
+        Returns:
+            geojson.FeatureCollection: One feature per risk area
+        """
+        properties = [
+            {
+                'id': area.get('id'),
+                'name': area.get('name'),
+                'risk_score': area.get('risk_score'),
+                'risk_factors': area.get('risk_factors', [])
+            }
+            for area in (self.risk_data or [])
+        ]
+        return self.get_risk_zones().to_feature_collection(properties)
+    
+    def build_weather_store(self, **kwargs):
+        """
+        Build a weather store from the current and forecast weather, located
+        at the center of each risk area.
+        
+        Args:
+            **kwargs: Lookup tolerances passed to WeatherStore
+            
+        Returns:
+            WeatherStore: Store for bulk weather lookups, or None without weather
+                data for any risk area
+        """
+        if not self.risk_data or not self.weather_data:
+            return None
+            
+        region_centers = {area.get('name'): area.get('center') for area in self.risk_data if area.get('center')}
+        store = WeatherStore.from_forecast(self.weather_data, region_centers, **kwargs)
+        if len(store.times) == 0:
+            logger.warning("No weather regions match a risk area name; using default weather")
+            return None
+        return store
     
     def predict_risk_trends(self, days=7):
         """
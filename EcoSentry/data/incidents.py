@@ -0,0 +1,386 @@
+import numpy as np
+import os
+import json
+import threading
+import logging
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from data.weather_store import EARTH_RADIUS_KM, unit_vectors
+
+try:
+    import fcntl
+except ImportError:  # Windows: the shared log is then only safe within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Smallest number of recent detections kept out of the KD-tree before it is rebuilt
+MIN_REBUILD_SIZE = 1024
+
+# Per-incident statistics, grown together as incidents are created
+_INCIDENT_FIELDS = ('_parent', '_count', '_first_seen', '_last_seen', '_xyz_sum', '_max_intensity')
+
+
+def _flatten_neighbours(neighbours):
+    """Turn query_ball_point's per-query lists into (query index, neighbour index) arrays"""
+    counts = np.fromiter((len(items) for items in neighbours), dtype=np.intp, count=len(neighbours))
+    if counts.sum() == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    queries = np.repeat(np.arange(len(neighbours)), counts)
+    return queries, np.concatenate([items for items in neighbours if items]).astype(np.intp)
+
+
+class IncidentTracker:
+    """
+    Incrementally merges fire detections into incidents.
+
+    Two detections belong to the same incident when they are within
+    distance_km of each other (great-circle) and within window_hours in
+    time, transitively, i.e. DBSCAN with a minimum of one sample. Each batch
+    of new detections is only compared against detections still inside the
+    time window, so history is never re-clustered. When a detection links
+    incidents that were separate, they are merged under the oldest id.
+
+    Active detections live in a KD-tree over 3D unit vectors plus a small
+    buffer of recent detections. The tree is rebuilt (dropping detections
+    that have left the window) once the buffer outgrows a fraction of it,
+    so each batch costs about O(batch log active).
+    """
+
+    def __init__(self, distance_km=2.0, window_hours=24, min_detections=2, rebuild_ratio=0.25):
+        """
+        Initialize the tracker
+
+        Args:
+            distance_km: Largest distance between linked detections
+            window_hours: Largest time gap between linked detections
+            min_detections: Detections an incident needs to count as confirmed
+            rebuild_ratio: Rebuild the KD-tree once the recent buffer exceeds
+                this fraction of it
+        """
+        self.distance_km = distance_km
+        self.window = np.timedelta64(int(window_hours * 3600), 's')
+        self.min_detections = min_detections
+        self.rebuild_ratio = rebuild_ratio
+        # Chord length on the unit sphere for the linking distance
+        self._radius = 2 * np.sin(distance_km / (2 * EARTH_RADIUS_KM))
+        self._lock = threading.Lock()
+
+        # Active detections: KD-tree part and recent part, as (xyz, times, detection index)
+        self._tree = None
+        self._tree_times = np.empty(0, dtype='datetime64[s]')
+        self._tree_index = np.empty(0, dtype=np.intp)
+        self._recent_xyz = np.empty((0, 3))
+        self._recent_times = np.empty(0, dtype='datetime64[s]')
+        self._recent_index = np.empty(0, dtype=np.intp)
+        self._latest = None
+
+        # Incident id assigned to every detection ever seen
+        self._detection_incident = np.empty(0, dtype=np.intp)
+        self._detections = 0
+
+        # Incident union-find and running statistics, indexed by incident id
+        self._incidents = 0
+        self._parent = np.empty(0, dtype=np.intp)
+        self._count = np.empty(0, dtype=np.int64)
+        self._first_seen = np.empty(0, dtype='datetime64[s]')
+        self._last_seen = np.empty(0, dtype='datetime64[s]')
+        self._xyz_sum = np.empty((0, 3))
+        self._max_intensity = np.empty(0)
+        self._names = {}
+
+    def _grow(self, names, size):
+        """Grow the named arrays to hold at least size rows, doubling capacity"""
+        for name in names:
+            array = getattr(self, name)
+            if len(array) < size:
+                grown = np.empty((max(size, 2 * len(array)),) + array.shape[1:], dtype=array.dtype)
+                grown[:len(array)] = array
+                setattr(self, name, grown)
+
+    def _find(self, incidents):
+        """Resolve incident ids to their surviving (root) incident, compressing paths"""
+        roots = np.asarray(incidents, dtype=np.intp).copy()
+        while True:
+            parents = self._parent[roots]
+            moved = parents != roots
+            if not moved.any():
+                break
+            roots[moved] = parents[moved]
+        self._parent[incidents] = roots
+        return roots
+
+    def _neighbours(self, xyz, times):
+        """
+        Find links between a batch and the active detections
+
+        Returns:
+            tuple: (batch index, linked batch index) pairs within the batch and
+                (batch index, linked detection index) pairs with active detections
+        """
+        batch_tree = cKDTree(xyz)
+        pairs = batch_tree.query_pairs(self._radius, output_type='ndarray')
+        inner = pairs[np.abs(times[pairs[:, 0]] - times[pairs[:, 1]]) <= self.window]
+
+        # Recent detections query the batch tree; the batch queries the big tree
+        recent, batch = _flatten_neighbours(batch_tree.query_ball_point(self._recent_xyz, self._radius))
+        links = [(batch, self._recent_index[recent], self._recent_times[recent])]
+        if self._tree is not None:
+            batch, tree = _flatten_neighbours(self._tree.query_ball_point(xyz, self._radius))
+            links.append((batch, self._tree_index[tree], self._tree_times[tree]))
+
+        batch = np.concatenate([link[0] for link in links])
+        detections = np.concatenate([link[1] for link in links])
+        linked_times = np.concatenate([link[2] for link in links])
+        in_window = np.abs(times[batch] - linked_times) <= self.window
+        return inner, (batch[in_window], detections[in_window])
+
+    def update(self, latitudes, longitudes, times, intensities=None, names=None):
+        """
+        Add a batch of detections
+
+        Args:
+            latitudes, longitudes: Detection coordinates
+            times: Detection times (anything np.datetime64 accepts)
+            intensities: Optional detection intensities
+            names: Optional detection names; an incident is named after its
+                first named detection
+
+        Returns:
+            numpy array: Incident id of each detection in the batch
+        """
+        lats = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        size = lats.size
+        times = np.broadcast_to(np.asarray(times, dtype='datetime64[s]'), (size,))
+        intensities = np.broadcast_to(np.asarray(0 if intensities is None else intensities, dtype=np.float64), (size,))
+        if size == 0:
+            return np.empty(0, dtype=np.intp)
+
+        xyz = unit_vectors(lats, lngs)
+
+        with self._lock:
+            inner, (batch, detections) = self._neighbours(xyz, times)
+
+            # Graph over the batch plus the incidents it touches
+            touched, touched_node = np.unique(self._find(self._detection_incident[detections]), return_inverse=True)
+            nodes = size + len(touched)
+            rows = np.concatenate([inner[:, 0], batch])
+            cols = np.concatenate([inner[:, 1], size + touched_node])
+            graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(nodes, nodes))
+            components, component = connected_components(graph, directed=False)
+
+            # Each component keeps its oldest incident, or becomes a new one
+            survivor = np.full(components, np.iinfo(np.intp).max, dtype=np.intp)
+            np.minimum.at(survivor, component[size:], touched)
+            new = survivor == np.iinfo(np.intp).max
+            survivor[new] = self._incidents + np.arange(np.count_nonzero(new))
+            self._incidents += np.count_nonzero(new)
+            self._grow(_INCIDENT_FIELDS, self._incidents)
+            created = survivor[new]
+            self._parent[created] = created
+            self._count[created] = 0
+            self._first_seen[created] = times.max()
+            self._last_seen[created] = times.min()
+            self._xyz_sum[created] = 0
+            self._max_intensity[created] = -np.inf
+
+            # Fold merged incidents into their survivor
+            into = survivor[component[size:]]
+            merged = into != touched
+            if merged.any():
+                into, merged = into[merged], touched[merged]
+                self._parent[merged] = into
+                np.add.at(self._count, into, self._count[merged])
+                np.minimum.at(self._first_seen, into, self._first_seen[merged])
+                np.maximum.at(self._last_seen, into, self._last_seen[merged])
+                np.add.at(self._xyz_sum, into, self._xyz_sum[merged])
+                np.maximum.at(self._max_intensity, into, self._max_intensity[merged])
+                for incident, survivor_id in zip(merged.tolist(), into.tolist()):
+                    if incident in self._names:
+                        self._names.setdefault(survivor_id, self._names.pop(incident))
+
+            labels = survivor[component[:size]]
+            np.add.at(self._count, labels, 1)
+            np.minimum.at(self._first_seen, labels, times)
+            np.maximum.at(self._last_seen, labels, times)
+            np.add.at(self._xyz_sum, labels, xyz)
+            np.maximum.at(self._max_intensity, labels, intensities)
+
+            # Record the detections and make them linkable by later batches
+            index = self._detections + np.arange(size)
+            self._grow(('_detection_incident',), self._detections + size)
+            self._detection_incident[index] = labels
+            for label, name in zip(labels.tolist(), names or []):
+                if name:
+                    self._names.setdefault(label, name)
+            self._detections += size
+
+            self._recent_xyz = np.concatenate([self._recent_xyz, xyz])
+            self._recent_times = np.concatenate([self._recent_times, times])
+            self._recent_index = np.concatenate([self._recent_index, index])
+            self._latest = times.max() if self._latest is None else max(self._latest, times.max())
+            if len(self._recent_index) > max(MIN_REBUILD_SIZE, self.rebuild_ratio * len(self._tree_index)):
+                self._rebuild()
+
+        return labels
+
+    def _rebuild(self):
+        """Move recent detections into the KD-tree, dropping those outside the time window"""
+        xyz = self._recent_xyz if self._tree is None else np.concatenate([self._tree.data, self._recent_xyz])
+        times = np.concatenate([self._tree_times, self._recent_times])
+        index = np.concatenate([self._tree_index, self._recent_index])
+
+        active = times >= self._latest - self.window
+        self._tree = cKDTree(xyz[active]) if active.any() else None
+        self._tree_times = times[active]
+        self._tree_index = index[active]
+        self._recent_xyz = np.empty((0, 3))
+        self._recent_times = np.empty(0, dtype='datetime64[s]')
+        self._recent_index = np.empty(0, dtype=np.intp)
+
+    def labels(self):
+        """
+        Get the current incident of every detection, in arrival order
+
+        Returns:
+            numpy array: Incident id per detection, reflecting later merges
+        """
+        with self._lock:
+            return self._find(self._detection_incident[:self._detections])
+
+    def incidents(self, active_only=True):
+        """
+        Summarize the incidents
+
+        Args:
+            active_only: Only include incidents seen within the time window
+                of the latest detection
+
+        Returns:
+            list: One dict per incident with its detection count, first and
+                last detection time, center and peak intensity
+        """
+        with self._lock:
+            ids = np.arange(self._incidents)
+            roots = ids[self._parent[:self._incidents] == ids]
+            if active_only and self._latest is not None:
+                roots = roots[self._last_seen[roots] >= self._latest - self.window]
+
+            center = self._xyz_sum[roots]
+            center = center / np.linalg.norm(center, axis=1, keepdims=True)
+            lats = np.degrees(np.arcsin(np.clip(center[:, 2], -1, 1)))
+            lngs = np.degrees(np.arctan2(center[:, 1], center[:, 0]))
+
+            return [
+                {
+                    'id': int(incident),
+                    'name': self._names.get(int(incident), f'Incident {incident}'),
+                    'location': {'lat': round(float(lat), 6), 'lng': round(float(lng), 6)},
+                    'detections': int(count),
+                    'first_seen': str(first),
+                    'last_seen': str(last),
+                    'started': str(first)[:10],
+                    'intensity': float(intensity),
+                    'confirmed': bool(count >= self.min_detections)
+                }
+                for incident, lat, lng, count, first, last, intensity in zip(
+                    roots, lats, lngs, self._count[roots], self._first_seen[roots],
+                    self._last_seen[roots], self._max_intensity[roots]
+                )
+            ]
+
+
+def _lock_file(f, exclusive):
+    """Hold an advisory lock on an open file until it is closed"""
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+
+class SharedIncidentTracker:
+    """
+    Keeps IncidentTrackers in several processes in step through a shared
+    append-only detection log.
+
+    Every batch of detections is appended to the log as one JSON line under
+    an exclusive file lock. Each process replays the lines it has not seen
+    yet into its own tracker before reading or updating it. Clustering is
+    deterministic in batch order, so every gunicorn worker ends up with the
+    same incidents and incident ids, and each worker only processes the
+    batches that are new to it.
+    """
+
+    def __init__(self, tracker, path):
+        """
+        Initialize the shared tracker
+
+        Args:
+            tracker: IncidentTracker with the same starting state in every
+                process (e.g. seeded from the same active fires)
+            path: Detection log file shared by the processes
+        """
+        self.tracker = tracker
+        self.path = path
+        self._offset = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        open(path, 'ab').close()
+
+    def _replay(self, f):
+        """Apply the batches logged since this process last read the log"""
+        f.seek(self._offset)
+        data = f.read()
+        for line in data.splitlines():
+            batch = json.loads(line)
+            self.tracker.update(batch['lat'], batch['lng'], batch['time'], batch['intensity'], batch['name'])
+        self._offset += len(data)
+
+    def sync(self):
+        """Catch up with detections logged by other processes"""
+        with self._lock, open(self.path, 'rb') as f:
+            _lock_file(f, exclusive=False)
+            self._replay(f)
+
+    def update(self, latitudes, longitudes, times, intensities=None, names=None):
+        """
+        Add a batch of detections and log it for the other processes
+
+        Args:
+            See IncidentTracker.update
+
+        Returns:
+            numpy array: Incident id of each detection in the batch
+        """
+        lats = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        size = lats.size
+        record = json.dumps({
+            'lat': lats.tolist(),
+            'lng': np.atleast_1d(np.asarray(longitudes, dtype=np.float64)).tolist(),
+            'time': np.broadcast_to(np.asarray(times, dtype='datetime64[s]'), (size,)).astype(str).tolist(),
+            'intensity': np.broadcast_to(np.asarray(0 if intensities is None else intensities, dtype=np.float64),
+                                         (size,)).tolist(),
+            'name': list(names) if names is not None else [None] * size
+        })
+
+        with self._lock, open(self.path, 'a+b') as f:
+            _lock_file(f, exclusive=True)
+            self._replay(f)
+            # Apply the batch exactly as other processes will replay it
+            batch = json.loads(record)
+            labels = self.tracker.update(batch['lat'], batch['lng'], batch['time'], batch['intensity'], batch['name'])
+            f.write(record.encode('utf-8') + b'\n')
+            f.flush()
+            self._offset = f.tell()
+
+        return labels
+
+    def labels(self):
+        """Get the current incident of every detection (see IncidentTracker.labels)"""
+        self.sync()
+        return self.tracker.labels()
+
+    def incidents(self, active_only=True):
+        """Summarize the incidents (see IncidentTracker.incidents)"""
+        self.sync()
+        return self.tracker.incidents(active_only=active_only)
@@ -0,0 +1,274 @@
+import numpy as np
+import geojson
+import logging
+from data.weather_store import EARTH_RADIUS_KM
+
+logger = logging.getLogger(__name__)
+
+# Mean Earth radius in meters
+EARTH_RADIUS_M = EARTH_RADIUS_KM * 1000
+
+# Upper bound on (candidate points x polygon edges) evaluated per ray-casting step
+MAX_CROSSING_CELLS = 1 << 22
+
+# Upper bound on the bucket grid used to find each zone's candidate points, per axis
+MAX_GRID_CELLS = 1024
+
+
+def destination_points(lat, lng, distances, bearings):
+    """
+    Points at the given distances and bearings from a center, on a sphere
+
+    Unlike a flat meters/111000 conversion, this accounts for meridians
+    converging away from the equator.
+
+    Args:
+        lat, lng: Center in degrees
+        distances: Array of distances in meters
+        bearings: Array of bearings in radians, clockwise from north
+
+    Returns:
+        tuple: (latitudes, longitudes) arrays in degrees
+    """
+    phi = np.radians(lat)
+    delta = np.asarray(distances, dtype=np.float64) / EARTH_RADIUS_M
+    bearings = np.asarray(bearings, dtype=np.float64)
+
+    lat2 = np.arcsin(np.sin(phi) * np.cos(delta) + np.cos(phi) * np.sin(delta) * np.cos(bearings))
+    lng2 = np.radians(lng) + np.arctan2(
+        np.sin(bearings) * np.sin(delta) * np.cos(phi),
+        np.cos(delta) - np.sin(phi) * np.sin(lat2)
+    )
+    return np.degrees(lat2), (np.degrees(lng2) + 540) % 360 - 180
+
+
+def circle_polygon(lat, lng, radius, segments=64):
+    """
+    Approximate a circular risk area as a GeoJSON polygon
+
+    Args:
+        lat, lng: Center in degrees
+        radius: Radius in meters
+        segments: Number of polygon vertices
+
+    Returns:
+        geojson.Polygon: Closed ring in [lng, lat] order
+    """
+    bearings = np.linspace(0, 2 * np.pi, segments, endpoint=False)
+    lats, lngs = destination_points(lat, lng, np.full(segments, float(radius)), bearings)
+    ring = [[float(x), float(y)] for x, y in zip(lngs, lats)]
+    return geojson.Polygon([ring + ring[:1]])
+
+
+def _rings(geometry):
+    """Extract the coordinate rings of a GeoJSON Polygon, MultiPolygon or Feature"""
+    if geometry.get('type') == 'Feature':
+        geometry = geometry['geometry']
+
+    kind = geometry.get('type')
+    if kind == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif kind == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        raise ValueError(f"Unsupported risk area geometry: {kind}")
+
+    return [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon]
+
+
+class RiskZones:
+    """
+    Polygon risk zones with vectorized point-in-polygon classification.
+
+    All rings of a zone (outer rings, holes and the parts of a MultiPolygon)
+    are flattened into one edge list and tested with the even-odd ray-casting
+    rule, so holes and multi-part zones need no special handling. Each zone
+    only tests the points inside its bounding box, found through a coarse
+    bucket grid over the points, so classification cost grows with the
+    points near each zone rather than points x zones.
+    """
+
+    def __init__(self, geometries, priorities=None):
+        """
+        Initialize the zones
+
+        Args:
+            geometries: GeoJSON Polygon/MultiPolygon geometries (or Features)
+            priorities: Optional score per zone; a point inside overlapping
+                zones is assigned to the highest-priority one (default: the
+                first one listed)
+        """
+        self.geometries = list(geometries)
+        self.edges = []
+        bounds = []
+
+        for geometry in self.geometries:
+            rings = _rings(geometry)
+            # Edge i runs from vertex i to vertex i + 1 (GeoJSON rings are closed)
+            starts = np.concatenate([ring[:-1] for ring in rings])
+            ends = np.concatenate([ring[1:] for ring in rings])
+            self.edges.append(self._edge_arrays(starts, ends))
+
+            points = np.concatenate(rings)
+            bounds.append([points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max()])
+
+        # (west, south, east, north) per zone
+        self.bounds = np.array(bounds, dtype=np.float64).reshape(-1, 4)
+
+        if priorities is None:
+            self.order = np.arange(len(self.geometries))
+        else:
+            self.order = np.argsort(-np.asarray(priorities, dtype=np.float64), kind='stable')
+
+    @classmethod
+    def from_risk_areas(cls, risk_areas, segments=64):
+        """
+        Build zones from risk_data.json risk areas
+
+        Areas with a GeoJSON 'geometry' use it as is; circular areas with a
+        'center' and 'radius' in meters are converted to polygons.
+
+        Args:
+            risk_areas: List of risk area dictionaries
+            segments: Vertices used to approximate circular areas
+
+        Returns:
+            RiskZones: One zone per area, in the same order, prioritised by risk_score
+        """
+        geometries = []
+        for area in risk_areas:
+            if area.get('geometry'):
+                geometries.append(area['geometry'])
+            else:
+                center = area.get('center', {})
+                geometries.append(circle_polygon(center['lat'], center['lng'], area.get('radius', 0), segments))
+
+        return cls(geometries, priorities=[area.get('risk_score', 0) for area in risk_areas])
+
+    @staticmethod
+    def _edge_arrays(starts, ends):
+        """Precompute per-edge terms of the ray-casting test"""
+        x1, y1 = starts[:, 0], starts[:, 1]
+        x2, y2 = ends[:, 0], ends[:, 1]
+        dy = y2 - y1
+        # Horizontal edges never cross a horizontal ray; give them a zero slope
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(dy != 0, (x2 - x1) / dy, 0.0)
+        return x1, y1, y2, slope
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def _contains(self, zone, lngs, lats):
+        """Ray-casting test of points against one zone's edges"""
+        x1, y1, y2, slope = self.edges[zone]
+        inside = np.zeros(lngs.size, dtype=bool)
+        step = max(1, MAX_CROSSING_CELLS // len(x1))
+
+        for start in range(0, lngs.size, step):
+            px = lngs[start:start + step, np.newaxis]
+            py = lats[start:start + step, np.newaxis]
+            # Edge straddles the ray's latitude and crosses east of the point
+            crossings = ((y1 > py) != (y2 > py)) & (px < x1 + (py - y1) * slope)
+            inside[start:start + step] = np.count_nonzero(crossings, axis=1) % 2 == 1
+        return inside
+
+    def contains(self, zone, latitudes, longitudes):
+        """
+        Test which points fall inside one zone
+
+        Returns:
+            numpy array: Boolean mask over the points
+        """
+        lats = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        west, south, east, north = self.bounds[zone]
+        result = (lats >= south) & (lats <= north) & (lngs >= west) & (lngs <= east)
+        candidates = np.flatnonzero(result)
+        result[candidates] = self._contains(zone, lngs[candidates], lats[candidates])
+        return result
+
+    def classify(self, latitudes, longitudes):
+        """
+        Assign points to zones
+
+        Args:
+            latitudes, longitudes: Arrays of point coordinates
+
+        Returns:
+            numpy array: Zone index per point, -1 for points outside every zone
+                (including points with non-finite coordinates)
+        """
+        lats = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        result = np.full(lats.size, -1, dtype=np.intp)
+
+        # Non-finite coordinates fall in no zone and would break the grid extent
+        finite = np.isfinite(lats) & np.isfinite(lngs)
+        if not finite.all():
+            index = np.flatnonzero(finite)
+            result[index] = self.classify(lats[index], lngs[index])
+            return result
+
+        if lats.size == 0 or len(self) == 0:
+            return result
+
+        # Bucket points into a coarse grid with cells about the size of a
+        # typical zone, sorted by cell so each grid row of a zone's bounding
+        # box is one contiguous slice of points
+        west, south = lngs.min(), lats.min()
+        extent = np.array([lngs.max() - west, lats.max() - south])
+        size = np.median(self.bounds[:, 2:] - self.bounds[:, :2], axis=0)
+        size = np.where(size > 0, size, 1.0)
+        shape = np.clip(np.floor(extent / size) + 1, 1, MAX_GRID_CELLS).astype(np.intp)
+        size = np.maximum(size, extent / shape)
+
+        cols = np.minimum(((lngs - west) / size[0]).astype(np.intp), shape[0] - 1)
+        rows = np.minimum(((lats - south) / size[1]).astype(np.intp), shape[1] - 1)
+        cells = rows * shape[0] + cols
+        order = np.argsort(cells, kind='stable')
+        starts = np.searchsorted(cells[order], np.arange(shape[0] * shape[1] + 1))
+
+        # Grid cells covered by each zone's bounding box, clipped to the grid
+        col_range = np.clip(((self.bounds[:, [0, 2]] - west) / size[0]).astype(np.intp), 0, shape[0] - 1)
+        row_range = np.clip(((self.bounds[:, [1, 3]] - south) / size[1]).astype(np.intp), 0, shape[1] - 1)
+        outside = ((self.bounds[:, 2] < west) | (self.bounds[:, 0] > west + extent[0])
+                   | (self.bounds[:, 3] < south) | (self.bounds[:, 1] > south + extent[1]))
+
+        for zone in self.order:
+            if outside[zone]:
+                continue
+
+            (col0, col1), (row0, row1) = col_range[zone], row_range[zone]
+            index = np.concatenate([
+                order[starts[row * shape[0] + col0]:starts[row * shape[0] + col1 + 1]]
+                for row in range(row0, row1 + 1)
+            ])
+
+            zone_west, zone_south, zone_east, zone_north = self.bounds[zone]
+            lng, lat = lngs[index], lats[index]
+            candidates = ((lng >= zone_west) & (lng <= zone_east) & (lat >= zone_south) & (lat <= zone_north)
+                          & (result[index] < 0))
+            if candidates.any():
+                inside = self._contains(zone, lng[candidates], lat[candidates])
+                result[index[candidates][inside]] = zone
+
+        return result
+
+    def to_feature_collection(self, properties=None):
+        """
+        Export the zones as a GeoJSON FeatureCollection
+
+        Args:
+            properties: Optional list of property dictionaries, one per zone
+
+        Returns:
+            geojson.FeatureCollection: One feature per zone
+        """
+        properties = properties or [{} for _ in self.geometries]
+        features = []
+        for geometry, props in zip(self.geometries, properties):
+            if geometry.get('type') == 'Feature':
+                geometry = geometry['geometry']
+            features.append(geojson.Feature(geometry=geometry, properties=props))
+        return geojson.FeatureCollection(features)
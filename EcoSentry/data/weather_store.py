@@ -0,0 +1,209 @@
+import numpy as np
+import json
+import os
+import logging
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+# Weather variables held by the store, named as FireRiskPredictor features
+WEATHER_FIELDS = ['temperature', 'humidity', 'wind_speed', 'precipitation']
+
+# Mean Earth radius in km
+EARTH_RADIUS_KM = 6371.0
+
+
+def unit_vectors(lats, lngs):
+    """Map lat/lng to 3D unit vectors so Euclidean neighbours are great-circle neighbours"""
+    lat = np.radians(lats)
+    lng = np.radians(lngs)
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+def _to_datetime64(values):
+    """Convert date strings, datetimes or datetime64 values to datetime64[s]"""
+    return np.asarray(values, dtype='datetime64[s]')
+
+
+class WeatherStore:
+    """
+    Time-indexed weather held in memory (or memory-mapped) for bulk lookups.
+
+    Weather is laid out either on a regular lat/lng grid, with arrays of shape
+    (times, rows, cols), or at a set of points such as region centers, with
+    arrays of shape (times, points). Lookups pick the nearest time and the
+    containing cell or nearest point for whole arrays of coordinates at once.
+    """
+
+    def __init__(self, times, variables, bounds=None, points=None, time_tolerance=None, max_distance_km=100):
+        """
+        Initialize the store
+
+        Args:
+            times: Sorted forecast times (anything np.datetime64 accepts)
+            variables: Dictionary of weather field name to array of shape
+                (times, rows, cols) for a grid or (times, points) for points
+            bounds: Grid bounds dict with north/south/east/west (grid layout)
+            points: (n, 2) array of point lat/lng (point layout)
+            time_tolerance: Largest gap to the nearest time that still counts
+                as a match (np.timedelta64), or None for no limit
+            max_distance_km: Largest distance to the nearest point that still
+                counts as a match (point layout only)
+        """
+        self.times = _to_datetime64(times)
+        self.variables = variables
+        self.bounds = bounds
+        self.time_tolerance = time_tolerance
+        self.max_distance_km = max_distance_km
+        self.directory = None
+
+        self.points = None
+        self._tree = None
+        if points is not None:
+            self.points = np.asarray(points, dtype=np.float64)
+            self._tree = cKDTree(unit_vectors(self.points[:, 0], self.points[:, 1]))
+
+    @classmethod
+    def load(cls, directory, **kwargs):
+        """
+        Load a gridded forecast from a directory in bulk
+
+        The directory holds a grid.json header with 'bounds' and 'times' and
+        one .npy array of shape (times, rows, cols) per weather field, i.e.
+        the nowcast weather layout with a leading time axis. Arrays are
+        memory-mapped, so only the cells that are looked up are read.
+
+        Returns:
+            WeatherStore: Grid-layout store
+        """
+        with open(os.path.join(directory, 'grid.json'), 'r') as f:
+            grid = json.load(f)
+
+        variables = {}
+        for name in WEATHER_FIELDS:
+            path = os.path.join(directory, f'{name}.npy')
+            if os.path.exists(path):
+                array = np.load(path, mmap_mode='r')
+                variables[name] = array if array.ndim == 3 else array[np.newaxis]
+
+        times = grid.get('times') or [grid.get('date', 'now')]
+        store = cls(times, variables, bounds=grid['bounds'], **kwargs)
+        store.directory = directory
+        logger.info(f"Loaded {len(variables)} weather fields x {len(store.times)} times from {directory}")
+        return store
+
+    @classmethod
+    def from_forecast(cls, weather_data, region_centers, **kwargs):
+        """
+        Build a point-layout store from per-region current and forecast weather
+
+        Args:
+            weather_data: Dictionary with 'current' ({region: weather incl. date})
+                and 'forecast' ([{date, regions: {region: weather}}]) as in risk_data.json
+            region_centers: Dictionary of region name to {'lat', 'lng'}
+
+        Returns:
+            WeatherStore: Point-layout store with one point per region
+        """
+        records = []
+        for region, weather in weather_data.get('current', {}).items():
+            if 'date' in weather:
+                records.append((weather['date'], region, weather))
+        for day in weather_data.get('forecast', []):
+            for region, weather in day.get('regions', {}).items():
+                records.append((day['date'], region, weather))
+
+        regions = sorted({region for _, region, _ in records if region in region_centers})
+        times = sorted({date for date, region, _ in records if region in region_centers})
+        region_index = {region: i for i, region in enumerate(regions)}
+        time_index = {date: i for i, date in enumerate(times)}
+
+        variables = {name: np.full((len(times), len(regions)), np.nan) for name in WEATHER_FIELDS}
+        for date, region, weather in records:
+            if region not in region_index:
+                continue
+            for name in WEATHER_FIELDS:
+                if weather.get(name) is not None:
+                    variables[name][time_index[date], region_index[region]] = weather[name]
+
+        points = [[region_centers[region]['lat'], region_centers[region]['lng']] for region in regions]
+        return cls(times, variables, points=np.array(points).reshape(-1, 2), **kwargs)
+
+    def __getstate__(self):
+        """Pickle memory-mapped stores by directory so worker processes re-map the files"""
+        state = self.__dict__.copy()
+        if self.directory is not None:
+            state['variables'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.variables is None:
+            self.variables = WeatherStore.load(self.directory).variables
+
+    def _time_indices(self, times, size):
+        """Index of the nearest stored time for each query, -1 if none is close enough"""
+        times = np.broadcast_to(_to_datetime64(times), (size,))
+        if len(self.times) == 0:
+            return np.full(size, -1, dtype=np.intp)
+        if len(self.times) == 1:
+            index = np.zeros(size, dtype=np.intp)
+        else:
+            index = np.clip(np.searchsorted(self.times, times), 1, len(self.times) - 1)
+            closer_left = (times - self.times[index - 1]) < (self.times[index] - times)
+            index = index - closer_left
+
+        if self.time_tolerance is not None:
+            index[np.abs(self.times[index] - times) > self.time_tolerance] = -1
+        return index
+
+    def _cell_indices(self, lats, lngs):
+        """Flat spatial index for each query, -1 outside the grid or too far from any point"""
+        if self.points is not None:
+            distance, index = self._tree.query(unit_vectors(lats, lngs))
+            # Chord length on the unit sphere to great-circle km
+            distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(distance / 2, 0, 1))
+            index[distance_km > self.max_distance_km] = -1
+            return index
+
+        rows, cols = next(iter(self.variables.values())).shape[1:]
+        bounds = self.bounds
+        row = np.floor((bounds['north'] - lats) / (bounds['north'] - bounds['south']) * rows)
+        col = np.floor((lngs - bounds['west']) / (bounds['east'] - bounds['west']) * cols)
+        inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+        return np.where(inside, row * cols + col, -1).astype(np.intp)
+
+    def lookup(self, latitudes, longitudes, times=None, fields=None):
+        """
+        Look up weather for arrays of locations and times
+
+        Args:
+            latitudes, longitudes: Arrays of query coordinates
+            times: Query time(s), scalar or array; defaults to now
+            fields: Weather fields to return (default: all stored fields)
+
+        Returns:
+            dict: Field name to float64 array, NaN where no weather matched
+        """
+        lats = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        lngs = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        size = lats.size
+        fields = [name for name in (fields or WEATHER_FIELDS) if name in self.variables]
+
+        result = {name: np.full(size, np.nan) for name in fields}
+        if not fields or size == 0:
+            return result
+
+        time_index = self._time_indices(np.datetime64('now') if times is None else times, size)
+        cell_index = self._cell_indices(lats, lngs)
+        found = (time_index >= 0) & (cell_index >= 0)
+        if not found.any():
+            return result
+
+        t = time_index[found]
+        cell = cell_index[found]
+        for name in fields:
+            values = self.variables[name]
+            flat = values.reshape(values.shape[0], -1)
+            result[name][found] = flat[t, cell]
+        return result
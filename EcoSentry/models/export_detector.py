@@ -0,0 +1,148 @@
+import numpy as np
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+from models.fire_detector import FireDetector
+from models.tflite_model import TFLiteModel
+
+
+def _median_latency(detector, images, rounds=20):
+    """
+    Median seconds per single-image classification on the serving path
+
+    Times FireDetector.classify without saliency, as /api/detect runs it,
+    rather than Keras model.predict, whose per-call setup dwarfs inference.
+    """
+    for image in images[:3]:
+        detector.classify(image[np.newaxis], saliency=False)
+    timings = []
+    for i in range(rounds):
+        image = images[i % len(images)][np.newaxis]
+        start = time.perf_counter()
+        detector.classify(image, saliency=False)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def check_parity(keras_model, tflite_model, images, threshold=0.5):
+    """
+    Compare TFLite outputs against the Keras model they were exported from
+
+    Returns:
+        dict: Output differences and agreement of fire/no-fire decisions
+    """
+    expected = keras_model.predict(images, verbose=0)[:, 0]
+    actual = tflite_model.predict(images)[:, 0]
+    diff = np.abs(expected - actual)
+
+    return {
+        'max_abs_diff': float(diff.max()),
+        'mean_abs_diff': float(diff.mean()),
+        'decision_agreement': float(np.mean((expected > threshold) == (actual > threshold)))
+    }
+
+
+def _peak_rss_mb():
+    """
+    Peak resident memory of this process in MB
+
+    Reads VmHWM where /proc is available: ru_maxrss survives exec on Linux,
+    so a child started from a large parent would report the parent's peak.
+    """
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_rss(model_path=None):
+    """
+    Measure peak resident memory of a fresh process that loads a detector and
+    runs one detection. Run in a subprocess so each backend starts clean.
+
+    Returns:
+        dict: Peak RSS in MB and whether the process imported TensorFlow
+    """
+    command = [sys.executable, '-m', 'models.export_detector', '--measure-rss']
+    if model_path:
+        command += ['--model', model_path]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export FireDetector to TFLite and compare against Keras')
+    parser.add_argument('--model', default=None, help='Keras model to export (default: demo model)')
+    parser.add_argument('--output', default=os.path.join('models', 'fire_detector.tflite'),
+                        help='Output .tflite path; quantized variants get a suffix')
+    parser.add_argument('--quantize', nargs='+', default=['none'], choices=['none', 'float16', 'int8'],
+                        help='Quantization modes to export')
+    parser.add_argument('--samples', type=int, default=32, help='Images used for parity checks')
+    parser.add_argument('--min-agreement', type=float, default=0.95,
+                        help='Minimum fire/no-fire decision agreement with Keras')
+    parser.add_argument('--skip-memory', action='store_true', help='Skip per-backend RSS measurement')
+    parser.add_argument('--measure-rss', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_rss:
+        detector = FireDetector(args.model)
+        detector.detect(_blank_png())
+        print(json.dumps({'peak_rss_mb': _peak_rss_mb(), 'tensorflow_loaded': 'tensorflow' in sys.modules}))
+        return 0
+
+    detector = FireDetector(args.model)
+    shape = (args.samples,) + tuple(detector.model.input_shape[1:])
+    images = np.random.default_rng(0).random(shape, dtype=np.float32)
+
+    report = {'keras': {'latency_ms': _median_latency(detector, images) * 1000}}
+    if not args.skip_memory:
+        report['keras'].update(measure_rss(args.model))
+
+    failed = False
+    for mode in args.quantize:
+        quantization = None if mode == 'none' else mode
+        root, ext = os.path.splitext(args.output)
+        path = args.output if quantization is None else f'{root}_{quantization}{ext}'
+
+        size = detector.export(path, quantization)
+        tflite_model = TFLiteModel(path)
+
+        result = {
+            'path': path,
+            'size_bytes': size,
+            'latency_ms': _median_latency(FireDetector(path, bands=detector.bands), images) * 1000
+        }
+        result.update(check_parity(detector.model, tflite_model, images))
+        if not args.skip_memory:
+            result.update(measure_rss(path))
+            if result['tensorflow_loaded']:
+                print(f"WARNING: {path} loaded TensorFlow; install tflite-runtime or ai-edge-litert "
+                      f"so the TFLite backend saves memory", file=sys.stderr)
+
+        if result['decision_agreement'] < args.min_agreement:
+            failed = True
+        report[f'tflite_{mode}'] = result
+
+    print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+
+def _blank_png():
+    """Encode a small blank PNG image for memory measurements"""
+    import io
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (224, 224)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
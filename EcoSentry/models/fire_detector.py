@@ -1,19 +1,42 @@
 import numpy as np
-import tensorflow as tf
 from PIL import Image
 import io
 import os
+import logging
+import threading
+from scipy import ndimage
+from monitoring import timed
+from models.tflite_model import TFLiteModel, export_tflite
+from models.spectral import prepare_bands
+
+logger = logging.getLogger(__name__)
 
 class FireDetector:
     """
     Class for detecting fires in satellite or aerial imagery using computer vision.
     Uses a CNN model to identify fires and smoke in images.
+    
+    Detection is reentrant and safe to call from many threads: Keras inference
+    runs through compiled tf.functions, and the TFLite backend gives each
+    thread its own interpreter.
     """
     
-    def __init__(self, model_path=None):
-        """Initialize the fire detection model"""
+    def __init__(self, model_path=None, bands=3):
+        """
+        Initialize the fire detection model
+        
+        Args:
+            model_path: Path to a saved Keras model, or to a .tflite model to
+                run on the lightweight TFLite interpreter without loading TensorFlow
+            bands: Number of spectral bands the demo model takes as input
+                (3 for RGB); loaded models use their own input band count
+        """
         self.model = None
+        self.backend = None
+        self._compiled = {}
+        self._compile_lock = threading.Lock()
         self.image_size = (224, 224)  # Standard input size for many CNN models
+        self.bands = bands
         
         # Load pre-trained model if available
         if model_path and os.path.exists(model_path):
@@ -28,9 +51,11 @@ class FireDetector:
         This is a very basic model that doesn't require downloading weights.
         In a real application, this would be a pre-trained model fine-tuned on fire detection.
         """
+        import tensorflow as tf
+        
         # Create a simplified model for demo purposes
         model = tf.keras.Sequential([
-            tf.keras.layers.Input(shape=(224, 224, 3)),
+            tf.keras.layers.Input(shape=(self.image_size[1], self.image_size[0], self.bands)),
             tf.keras.layers.Conv2D(16, (3, 3), activation='relu', padding='same'),
             tf.keras.layers.MaxPooling2D((2, 2)),
             tf.keras.layers.Conv2D(32, (3, 3), activation='relu', padding='same'),
@@ -49,6 +74,8 @@ class FireDetector:
         )
         
         self.model = model
+        self.backend = 'keras'
+        self._compiled = {}
         
         # For demo purposes, we won't actually train the model
         # Instead, we'll use it to generate plausible predictions
@@ -59,93 +86,279 @@ class FireDetector:
     def load_model(self, model_path):
         """Load a pre-trained model from disk"""
         try:
-            self.model = tf.keras.models.load_model(model_path)
-            print(f"Model loaded from {model_path}")
+            if model_path.endswith('.tflite'):
+                self.model = TFLiteModel(model_path)
+                self.backend = 'tflite'
+            else:
+                import tensorflow as tf
+                self.model = tf.keras.models.load_model(model_path)
+                self.backend = 'keras'
+            self._compiled = {}
+            
+            # Match the preprocessing size (width, height) and bands to the model input
+            self.image_size = (int(self.model.input_shape[2]), int(self.model.input_shape[1]))
+            self.bands = int(self.model.input_shape[3])
+            logger.info(f"Model loaded from {model_path}")
         except Exception as e:
-            print(f"Error loading model: {e}")
+            logger.error(f"Error loading model: {e}")
             self._initialize_demo_model()
     
+    def export(self, output_path, quantization=None, representative_images=None):
+        """
+        Export the Keras model to TFLite for the lightweight runtime
+        
+        Args:
+            output_path: Where to write the .tflite file
+            quantization: None, 'float16' or 'int8' post-training quantization
+            representative_images: Preprocessed images for int8 calibration
+            
+        Returns:
+            int: Size of the exported model in bytes
+        """
+        if self.backend != 'keras':
+            raise ValueError("Only Keras models can be exported")
+        
+        return export_tflite(self.model, output_path, quantization, representative_images)
+    
     def preprocess_image(self, image_data):
         """
         Preprocess image for model input
         
         Args:
-            image_data: Image file object or bytes
+            image_data: Image file object, bytes or an already decoded PIL image
             
         Returns:
             numpy array: Preprocessed image tensor
         """
-        # Open image
-        if hasattr(image_data, 'read'):
-            # If it's a file-like object
-            image = Image.open(image_data)
-        else:
-            # If it's bytes
-            image = Image.open(io.BytesIO(image_data))
+        if self.bands != 3:
+            raise ValueError(f"Model expects {self.bands} bands; use preprocess_array for multispectral input")
         
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        with timed('decode'):
+            # Open image
+            if isinstance(image_data, Image.Image):
+                # If it's already decoded (e.g. a video frame)
+                image = image_data
+            elif hasattr(image_data, 'read'):
+                # If it's a file-like object
+                image = Image.open(image_data)
+            else:
+                # If it's bytes
+                image = Image.open(io.BytesIO(image_data))
+            
+            # Convert to RGB if needed
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            
+            # PIL decodes lazily; force it here so it is timed as decode
+            image.load()
         
-        # Resize to expected dimensions
-        image = image.resize(self.image_size)
+        with timed('preprocess'):
+            # Resize to expected dimensions
+            image = image.resize(self.image_size)
+            
+            # Convert to numpy array and normalize
+            img_array = np.asarray(image, dtype=np.float32)
+            img_array = img_array / 255.0  # Normalize to [0,1]
+            
+            # Expand dimensions for batch
+            img_array = np.expand_dims(img_array, axis=0)
         
-        # Convert to numpy array and normalize
-        img_array = tf.keras.preprocessing.image.img_to_array(image)
-        img_array = img_array / 255.0  # Normalize to [0,1]
+        return img_array
+    
+    def preprocess_array(self, array, bands=None, scale=None, channels_first=False):
+        """
+        Preprocess a multispectral NumPy tile for model input, without a PIL round-trip
         
-        # Expand dimensions for batch
-        img_array = np.expand_dims(img_array, axis=0)
+        Args:
+            array: (height, width, bands) array, e.g. a memory-mapped .npy tile,
+                or (bands, height, width) if channels_first
+            bands: Indices of the bands to feed the model, in input order
+            scale: Value divided out to normalize (e.g. 10000 for reflectance);
+                per-band min-max scaling if None
+            
+        Returns:
+            numpy array: Preprocessed (1, height, width, bands) float32 tensor
+        """
+        with timed('preprocess'):
+            img_array = prepare_bands(array, self.image_size, bands, scale, channels_first)
         
-        return img_array
+        if img_array.shape[-1] != self.bands:
+            raise ValueError(f"Model expects {self.bands} bands, got {img_array.shape[-1]}")
+        
+        return img_array[np.newaxis]
+    
+    def _build_classify_function(self, saliency):
+        """
+        Compile a tf.function that classifies a batch, optionally computing
+        Grad-CAM heatmaps in the same forward/backward pass.
+        
+        Gradients only flow from the output back to the last convolutional
+        layer, so the extra cost over plain classification is bounded by the
+        size of the classification head, not the whole network.
+        
+        Returns:
+            tf.function or None: None if the model has no Conv2D layer for Grad-CAM
+        """
+        import tensorflow as tf
+        
+        signature = [tf.TensorSpec([None] + list(self.model.input_shape[1:]), tf.float32)]
+        model = self.model
+        
+        if not saliency:
+            @tf.function(input_signature=signature)
+            def classify_plain(images):
+                return model(images, training=False)[:, 0]
+            
+            return classify_plain
+        
+        conv_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Conv2D)]
+        if not conv_layers:
+            logger.warning("Model has no Conv2D layer; Grad-CAM heatmaps disabled")
+            return None
+        
+        cam_model = tf.keras.Model(inputs=model.inputs, outputs=[conv_layers[-1].output, model.outputs[0]])
+        height, width = self.image_size[1], self.image_size[0]
+        
+        @tf.function(input_signature=signature)
+        def classify_with_saliency(images):
+            with tf.GradientTape() as tape:
+                activations, predictions = cam_model(images, training=False)
+                score = predictions[:, 0]
+            
+            # Samples are independent, so the gradient of the summed score
+            # gives each image's own gradient
+            gradients = tape.gradient(score, activations)
+            channel_weights = tf.reduce_mean(gradients, axis=(1, 2))
+            
+            cam = tf.nn.relu(tf.einsum('nhwc,nc->nhw', activations, channel_weights))
+            cam = tf.image.resize(cam[..., tf.newaxis], (height, width), method='bilinear')[..., 0]
+            cam = cam / (tf.reduce_max(cam, axis=(1, 2), keepdims=True) + 1e-8)
+            
+            return predictions[:, 0], cam
+        
+        return classify_with_saliency
     
-    def _generate_heatmap(self, image_tensor):
+    def classify(self, img_batch, saliency=True):
         """
-        Generate a heatmap of fire detection probabilities across the image
-        This is a simplified demo version - in reality, would use Grad-CAM or similar
+        Classify a batch of preprocessed images
         
+        Args:
+            img_batch: float32 array of shape (n, height, width, channels)
+            saliency: Also compute Grad-CAM heatmaps (Keras backend only)
+            
         Returns:
-            2D numpy array: Heatmap of detection probabilities
+            tuple: (predictions, heatmaps)
+                predictions: Array of n fire probabilities
+                heatmaps: (n, height, width) array of activations scaled to
+                    [0, 1], or None when saliency is off or unsupported
         """
-        # In a real implementation, this would use Grad-CAM or a segmentation model
-        # For demo, we'll create a simple synthetic heatmap
+        # TFLite has no gradients, so it runs classification only
+        if self.backend != 'keras':
+            return self.model.predict(img_batch)[:, 0], None
         
-        # Get base prediction
-        prediction = self.model.predict(image_tensor)[0][0]
+        classify_function = self._compiled_function(saliency)
+        if classify_function is None:
+            saliency = False
+            classify_function = self._compiled_function(saliency)
         
-        # Generate random heatmap that correlates with the prediction
-        np.random.seed(int(prediction * 100))  # Deterministic based on prediction
+        img_batch = np.asarray(img_batch, dtype=np.float32)
+        if saliency:
+            predictions, heatmaps = classify_function(img_batch)
+            return predictions.numpy(), heatmaps.numpy()
         
-        # Create a base random heatmap
-        heatmap = np.random.rand(28, 28)  # Smaller resolution for heatmap
+        return classify_function(img_batch).numpy(), None
+    
+    def _compiled_function(self, saliency):
+        """Get the compiled classify function, building it on first use"""
+        if saliency not in self._compiled:
+            with self._compile_lock:
+                if saliency not in self._compiled:
+                    self._compiled[saliency] = self._build_classify_function(saliency)
+        return self._compiled[saliency]
+    
+    def _extract_regions(self, heatmap, prediction, threshold=0.5, max_regions=3):
+        """
+        Find fire regions as connected areas of high Grad-CAM activation
+        
+        Returns:
+            list: Up to max_regions bounding boxes, strongest first
+        """
+        labels, count = ndimage.label(heatmap > threshold)
+        if count == 0:
+            return []
+        
+        peaks = ndimage.maximum(heatmap, labels, index=np.arange(1, count + 1))
+        boxes = ndimage.find_objects(labels)
+        
+        regions = []
+        for label in np.argsort(peaks)[::-1][:max_regions]:
+            rows, cols = boxes[label]
+            regions.append({
+                'x': int(cols.start),
+                'y': int(rows.start),
+                'width': int(cols.stop - cols.start),
+                'height': int(rows.stop - rows.start),
+                'confidence': float(prediction * peaks[label])
+            })
         
-        # If prediction is high, create some hot spots
-        if prediction > 0.5:
-            # Add a few hot spots
-            num_hotspots = int(prediction * 5) + 1
-            for _ in range(num_hotspots):
-                x = np.random.randint(5, 23)
-                y = np.random.randint(5, 23)
-                radius = np.random.randint(3, 7)
+        return regions
+    
+    def detect_batch(self, images):
+        """
+        Detect fires in several images with a single batched model call
+        
+        Args:
+            images: List of image file objects, bytes or PIL images
+            
+        Returns:
+            list: Detection results, one per image (see detect)
+        """
+        if not images:
+            return []
+        
+        # Preprocess images
+        img_batch = np.concatenate([self.preprocess_image(image) for image in images])
+        
+        return self._detect_preprocessed(img_batch)
+    
+    def detect_array(self, array, bands=None, scale=None, channels_first=False):
+        """
+        Detect fires in a multispectral NumPy tile
+        
+        Args:
+            array: Tile array (see preprocess_array)
+            bands: Indices of the bands to feed the model, in input order
+            scale: Normalization divisor, or None for per-band min-max
+            
+        Returns:
+            dict: Detection results including confidence score and regions
+        """
+        img_batch = self.preprocess_array(array, bands, scale, channels_first)
+        return self._detect_preprocessed(img_batch)[0]
+    
+    def _detect_preprocessed(self, img_batch):
+        """Classify a preprocessed batch and extract regions for each image"""
+        # Classify and compute heatmaps in one pass
+        with timed('inference'):
+            predictions, heatmaps = self.classify(img_batch)
+        
+        results = []
+        with timed('region_extraction'):
+            for i, prediction in enumerate(predictions):
+                prediction = float(prediction)
                 
-                # Create a hotspot with Gaussian distribution
-                for i in range(max(0, x-radius), min(28, x+radius)):
-                    for j in range(max(0, y-radius), min(28, y+radius)):
-                        dist = np.sqrt((i-x)**2 + (j-y)**2)
-                        if dist < radius:
-                            intensity = 1.0 - (dist/radius) * 0.7
-                            heatmap[j, i] = max(heatmap[j, i], intensity)
-        
-        # Resize to image dimensions
-        heatmap_resized = np.zeros((224, 224))
-        scale_factor = 224 // 28
-        
-        for i in range(28):
-            for j in range(28):
-                heatmap_resized[i*scale_factor:(i+1)*scale_factor, 
-                               j*scale_factor:(j+1)*scale_factor] = heatmap[i, j]
-        
-        return heatmap_resized
+                # Regions come from the Grad-CAM activations of confident detections
+                detection_regions = []
+                if prediction > 0.3 and heatmaps is not None:  # Arbitrary threshold
+                    detection_regions = self._extract_regions(heatmaps[i], prediction)
+                
+                results.append({
+                    'has_fire': prediction > 0.5,
+                    'confidence': prediction,
+                    'regions': detection_regions
+                })
+        
+        return results
     
     def detect(self, image_data):
         """
@@ -157,56 +370,4 @@ class FireDetector:
         Returns:
             dict: Detection results including confidence score and regions
         """
-        # Preprocess image
-        img_tensor = self.preprocess_image(image_data)
-        
-        # Make prediction
-        prediction = float(self.model.predict(img_tensor)[0][0])
-        
-        # Generate heatmap for visualization
-        heatmap = self._generate_heatmap(img_tensor)
-        
-        # Determine detection regions (for demo purposes)
-        # In a real application, this would use object detection or segmentation
-        detection_regions = []
-        
-        if prediction > 0.3:  # Arbitrary threshold
-            # Find potential fire regions from the heatmap
-            threshold = 0.7
-            for _ in range(min(3, int(prediction * 5))):
-                # Find a random high-intensity region
-                high_intensity_points = np.where(heatmap > threshold)
-                if len(high_intensity_points[0]) > 0:
-                    # Pick a random high-intensity point
-                    idx = np.random.randint(0, len(high_intensity_points[0]))
-                    y, x = high_intensity_points[0][idx], high_intensity_points[1][idx]
-                    
-                    # Create a region around this point
-                    region_size = np.random.randint(20, 60)
-                    confidence = min(1.0, prediction * (1.0 + np.random.rand() * 0.5))
-                    
-                    region = {
-                        'x': int(x - region_size/2),
-                        'y': int(y - region_size/2),
-                        'width': region_size,
-                        'height': region_size,
-                        'confidence': float(confidence)
-                    }
-                    
-                    detection_regions.append(region)
-                    
-                    # Remove this region from the heatmap to find other distinct regions
-                    y_min = max(0, y - region_size//2)
-                    y_max = min(heatmap.shape[0], y + region_size//2)
-                    x_min = max(0, x - region_size//2)
-                    x_max = min(heatmap.shape[1], x + region_size//2)
-                    heatmap[y_min:y_max, x_min:x_max] = 0
-        
-        # Format the result
-        result = {
-            'has_fire': prediction > 0.5,
-            'confidence': prediction,
-            'regions': detection_regions
-        }
-        
-        return result
+        return self.detect_batch([image_data])[0]
@@ -2,28 +2,86 @@ import numpy as np
 import pandas as pd
 import joblib
 import os
+import logging
 from datetime import datetime
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
+from monitoring import timed
+
+logger = logging.getLogger(__name__)
+
+# Model input columns, in order
+FEATURE_NAMES = ['temperature', 'humidity', 'wind_speed', 'precipitation',
+                 'vegetation_dryness', 'slope', 'elevation']
+
+# Weather inputs supplied by callers and their defaults when missing
+WEATHER_FEATURES = ['temperature', 'humidity', 'wind_speed', 'precipitation']
+WEATHER_DEFAULTS = {
+    'temperature': 25,  # Default to 25°C
+    'humidity': 50,  # Default to 50%
+    'wind_speed': 5,  # Default to 5 km/h
+    'precipitation': 0  # Default to 0 mm
+}
+
+
+def _column(data, name, default, size):
+    """Read a feature as a float array of length size, filling missing values"""
+    value = data.get(name)
+    if value is None:
+        return np.full(size, default, dtype=np.float64)
+    
+    column = np.array(np.broadcast_to(np.asarray(value, dtype=np.float64), (size,)))
+    column[np.isnan(column)] = default
+    return column
+
+
+def _hash_uniform(seed, stream):
+    """Map integer seeds to uniform floats in [0, 1) with a splitmix64 hash"""
+    with np.errstate(over='ignore'):
+        x = seed + np.uint64(stream + 1) * np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+# Predictor installed in each process pool worker by init_worker
+_worker_predictor = None
+
+
+def init_worker(predictor):
+    """Pool initializer: keep one predictor copy per worker process"""
+    global _worker_predictor
+    _worker_predictor = predictor
+
+
+def worker_predictor():
+    """Get the predictor that init_worker installed in this process"""
+    return _worker_predictor
+
 
 class FireRiskPredictor:
     """
     Class for predicting wildfire risk based on weather and geographic features.
     Uses a Random Forest model to predict risk score and identify contributing factors.
+    
+    Prediction is reentrant: it keeps no per-call state on the instance and
+    uses no global RNG, so one instance can serve many threads.
     """
     
-    def __init__(self, model_path=None):
-        """Initialize the fire risk prediction model"""
+    def __init__(self, model_path=None, weather_store=None):
+        """
+        Initialize the fire risk prediction model
+        
+        Args:
+            model_path: Path to a trained model
+            weather_store: Optional WeatherStore used to fill weather fields
+                that callers leave out
+        """
         self.model = None
         self.scaler = StandardScaler()
+        self.weather_store = weather_store
         
-        # Load pre-trained model if available
-        if model_path and os.path.exists(model_path):
-            self.load_model(model_path)
-        else:
-            # For demo purposes, initialize a simple model
-            self._initialize_demo_model()
-            
         # Feature importance dictionary (for explanation)
         self.feature_importance = {
             'temperature': 0.25,
@@ -35,6 +93,13 @@ class FireRiskPredictor:
             'elevation': 0.03
         }
         
+        # Load pre-trained model if available
+        if model_path and os.path.exists(model_path):
+            self.load_model(model_path)
+        else:
+            # For demo purposes, initialize a simple model
+            self._initialize_demo_model()
+            
         # Risk thresholds
         self.risk_thresholds = {
             'low': 0.3,
@@ -47,8 +112,10 @@ class FireRiskPredictor:
         """Initialize a simple model for demonstration purposes"""
         self.model = RandomForestClassifier(n_estimators=50, random_state=42)
         
-        # Generate synthetic training data
-        X_train = np.random.rand(100, 7)  # 7 features
+        # Generate synthetic training data from a local generator, leaving
+        # NumPy's global RNG untouched
+        rng = np.random.default_rng(42)
+        X_train = rng.random((100, 7))  # 7 features
         y_train = (X_train[:, 0] * 0.25 +  # temperature
                   (1 - X_train[:, 1]) * 0.22 +  # humidity (inverse)
                   X_train[:, 2] * 0.18 +  # wind_speed
@@ -64,46 +131,128 @@ class FireRiskPredictor:
         self.scaler.fit(X_train)
     
     def load_model(self, model_path):
-        """Load a pre-trained model from disk"""
+        """
+        Load a pre-trained model from disk
+        
+        Accepts a bundle saved by RiskModelTrainer (model, fitted scaler and
+        metadata) or a bare estimator trained on unscaled features.
+        """
         try:
-            self.model = joblib.load(model_path)
-            print(f"Model loaded from {model_path}")
+            loaded = joblib.load(model_path)
         except Exception as e:
-            print(f"Error loading model: {e}")
+            logger.error(f"Error loading model: {e}")
             self._initialize_demo_model()
+            return
+        
+        if isinstance(loaded, dict):
+            self.model = loaded['model']
+            self.scaler = loaded['scaler']
+            if loaded.get('metadata', {}).get('weather') is False:
+                logger.warning(f"Model {model_path} was trained without weather; its predictions ignore "
+                               f"temperature, humidity, wind and precipitation")
+        else:
+            # A bare estimator carries no scaler; pass features through unscaled
+            self.model = loaded
+            self.scaler = StandardScaler(with_mean=False, with_std=False).fit(np.zeros((1, len(FEATURE_NAMES))))
+        
+        if hasattr(self.model, 'feature_importances_'):
+            # Trained models report their own importances
+            self.feature_importance = dict(zip(FEATURE_NAMES, self.model.feature_importances_.tolist()))
+        
+        logger.info(f"Model loaded from {model_path}")
     
-    def _extract_features(self, data):
-        """Extract and transform features from input data"""
-        # Extract known features
-        features = []
-        features.append(data.get('temperature', 25))  # Default to 25°C
-        features.append(data.get('humidity', 50))  # Default to 50%
-        features.append(data.get('wind_speed', 5))  # Default to 5 km/h
-        features.append(data.get('precipitation', 0))  # Default to 0 mm
-        
-        # For demo, generate some synthetic values for features that would 
-        # normally come from GIS or vegetation data
-        lat = data.get('latitude', 0)
-        lng = data.get('longitude', 0)
-        
-        # Generate deterministic but "random-looking" values based on lat/lng
-        seed = int(abs(lat * 1000) + abs(lng * 1000))
-        np.random.seed(seed)
+    def _synthetic_terrain(self, latitude, longitude):
+        """
+        Generate vegetation and terrain features for the given coordinates.
+        
+        For demo, values are deterministic but "random-looking" functions of
+        lat/lng. They are computed with a vectorized hash rather than by
+        reseeding NumPy's RNG, so a whole grid is evaluated in one pass and a
+        point query returns the same values as its grid cell.
+        
+        Returns:
+            tuple: (vegetation_dryness, slope, elevation) arrays
+        """
+        latitude = np.atleast_1d(np.asarray(latitude, dtype=np.float64))
+        longitude = np.atleast_1d(np.asarray(longitude, dtype=np.float64))
+        seed = (np.abs(latitude * 1000) + np.abs(longitude * 1000)).astype(np.uint64)
         
         # Vegetation dryness (would normally come from remote sensing)
-        veg_dryness = np.random.rand() * 0.7 + 0.3  # Between 0.3 and 1.0
-        features.append(veg_dryness)
+        veg_dryness = _hash_uniform(seed, 0) * 0.7 + 0.3  # Between 0.3 and 1.0
         
         # Terrain features (would normally come from elevation data)
-        slope = np.random.rand() * 30  # Slope in degrees (0-30)
-        features.append(slope)
+        slope = _hash_uniform(seed, 1) * 30  # Slope in degrees (0-30)
+        elevation = _hash_uniform(seed, 2) * 1000 + 200  # Elevation in meters (200-1200)
         
-        elevation = np.random.rand() * 1000 + 200  # Elevation in meters (200-1200)
-        features.append(elevation)
+        return veg_dryness, slope, elevation
+    
+    def _build_feature_matrix(self, data, size, time=None):
+        """
+        Assemble the unscaled (size, 7) feature matrix from column data
+        
+        Args:
+            data: Mapping of feature name to scalar or array-like values
+            size: Number of rows to produce
+            time: Time(s) of the prediction for weather lookups; defaults
+                to data['time'] or data['date']
+            
+        Returns:
+            numpy array: Feature matrix in FEATURE_NAMES order
+        """
+        features = np.empty((size, len(FEATURE_NAMES)), dtype=np.float64)
+        latitude = _column(data, 'latitude', 0, size)
+        longitude = _column(data, 'longitude', 0, size)
+        
+        # Weather features as supplied; NaN marks missing values
+        weather = features[:, :len(WEATHER_FEATURES)]
+        for col, name in enumerate(WEATHER_FEATURES):
+            weather[:, col] = _column(data, name, np.nan, size)
+        
+        # Fill missing weather from the store with one vectorized lookup
+        missing = np.isnan(weather)
+        if self.weather_store is not None and missing.any():
+            rows = missing.any(axis=1)
+            stored = self.weather_store.lookup(
+                latitude[rows], longitude[rows], self._lookup_times(data, size, time)[rows]
+            )
+            for col, name in enumerate(WEATHER_FEATURES):
+                if name in stored:
+                    column = weather[rows, col]
+                    gaps = np.isnan(column)
+                    column[gaps] = stored[name][gaps]
+                    weather[rows, col] = column
+        
+        # Fall back to defaults for anything still missing
+        for col, name in enumerate(WEATHER_FEATURES):
+            weather[np.isnan(weather[:, col]), col] = WEATHER_DEFAULTS[name]
+        
+        # For demo, synthesize the features that would normally come from
+        # GIS or vegetation data
+        veg_dryness, slope, elevation = self._synthetic_terrain(latitude, longitude)
+        features[:, 4] = veg_dryness
+        features[:, 5] = slope
+        features[:, 6] = elevation
+        
+        return features
+    
+    def _lookup_times(self, data, size, time=None):
+        """Get prediction times as a datetime64 array, defaulting to now"""
+        if time is None:
+            time = data.get('time', data.get('date'))
+        try:
+            times = np.asarray(time if time is not None else 'now', dtype='datetime64[s]')
+        except ValueError:
+            times = np.asarray('now', dtype='datetime64[s]')  # Ignore unparseable dates
+        return np.broadcast_to(times, (size,))
+    
+    def _extract_features(self, data):
+        """Extract and transform features from input data"""
+        with timed('feature_extraction'):
+            features = self._build_feature_matrix(data, 1)
         
         # Normalize features
-        features = np.array(features).reshape(1, -1)
-        features_scaled = self.scaler.transform(features)
+        with timed('scaler'):
+            features_scaled = self.scaler.transform(features)
         
         return features_scaled
     
@@ -158,27 +307,59 @@ class FireRiskPredictor:
         features = self._extract_features(data)
         
         # Get model prediction (probability of high risk)
-        if hasattr(self.model, 'predict_proba'):
-            risk_score = self.model.predict_proba(features)[0, 1]  # Probability of class 1
-        else:
-            # Fallback for models without predict_proba
-            prediction = self.model.predict(features)[0]
-            risk_score = float(prediction)  # 0 or 1
+        with timed('predict_proba'):
+            if hasattr(self.model, 'predict_proba'):
+                risk_score = self.model.predict_proba(features)[0, 1]  # Probability of class 1
+            else:
+                # Fallback for models without predict_proba
+                prediction = self.model.predict(features)[0]
+                risk_score = float(prediction)  # 0 or 1
         
         # Determine risk factors
         risk_factors = self._calculate_risk_factors(features)
         
         # Add season-based risk if date is provided
-        if 'date' in data:
-            try:
-                date = datetime.strptime(data['date'], '%Y-%m-%d')
-                month = date.month
-                
-                # Northern hemisphere summer (higher risk)
-                if 6 <= month <= 9:
-                    risk_score = min(risk_score * 1.2, 1.0)  # Increase risk but cap at 1.0
-                    risk_factors.append('Summer season')
-            except Exception:
-                pass  # Ignore date parsing errors
+        if 'date' in data and self._is_summer(data['date']):
+            risk_score = min(risk_score * 1.2, 1.0)  # Increase risk but cap at 1.0
+            risk_factors.append('Summer season')
         
         return risk_score, risk_factors
+    
+    def predict_batch(self, data, date=None):
+        """
+        Predict fire risk scores for many locations at once
+        
+        Args:
+            data: Dictionary mapping feature names (latitude, longitude,
+                temperature, humidity, wind_speed, precipitation) to arrays of
+                equal length; missing weather fields use the same defaults as
+                predict
+            date: Optional 'YYYY-MM-DD' string for the seasonal adjustment
+            
+        Returns:
+            numpy array: Risk scores between 0 and 1, one per location
+        """
+        size = len(np.atleast_1d(data.get('latitude', [])))
+        if size == 0:
+            return np.empty(0, dtype=np.float64)
+        
+        features = self.scaler.transform(self._build_feature_matrix(data, size, time=date))
+        
+        if hasattr(self.model, 'predict_proba'):
+            risk_scores = self.model.predict_proba(features)[:, 1]
+        else:
+            risk_scores = self.model.predict(features).astype(np.float64)
+        
+        if date is not None and self._is_summer(date):
+            risk_scores = np.minimum(risk_scores * 1.2, 1.0)
+        
+        return risk_scores
+    
+    def _is_summer(self, date_str):
+        """Check whether a 'YYYY-MM-DD' date falls in the northern hemisphere fire season"""
+        try:
+            month = datetime.strptime(date_str, '%Y-%m-%d').month
+        except Exception:
+            return False  # Ignore date parsing errors
+        
+        return 6 <= month <= 9
@@ -0,0 +1,313 @@
+import numpy as np
+import math
+import sys
+import time
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from scipy.ndimage import uniform_filter
+from models.fire_predictor import FireRiskPredictor, WEATHER_DEFAULTS
+
+# Meters per degree of latitude
+METERS_PER_DEGREE = 111320
+
+# Neighbor offsets (row, col) of the 8-cell Moore neighborhood
+NEIGHBORS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+# Cellular automaton constants, after Alexandridis et al. (2008)
+BASE_SPREAD_PROBABILITY = 0.58
+WIND_C1 = 0.045   # Overall wind effect (per m/s)
+WIND_C2 = 0.131   # Directional wind effect (per m/s)
+SLOPE_A = 0.078   # Slope effect (per degree)
+
+# Elevation is averaged over this distance before slopes are taken. The demo
+# terrain is independent per cell, so raw neighbor differences give cliffs of
+# up to ~76 degrees that saturate the automaton and drown out wind.
+TERRAIN_SMOOTHING_M = 2000
+
+# Steepest slope used for spread, matching the predictor's slope feature range
+MAX_SLOPE_DEGREES = 30
+
+# Process pool shared by every simulation in this process, created on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _member_pool(workers):
+    """
+    Get the long-lived pool that runs ensemble members
+
+    Workers are spawned rather than forked: the server process is
+    multithreaded (and may have TensorFlow loaded), which fork does not
+    handle safely. The pool is created once, so requests don't pay the
+    worker start-up cost.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _run_members(task):
+    """
+    Run a block of Monte Carlo ensemble members
+
+    All members advance together as a (members, rows, cols) stack, and each
+    step is a handful of whole-array stencil operations over the 8 neighbor
+    directions.
+
+    Args:
+        task: Tuple of (spread_probability, ignition, steps, members, seed)
+
+    Returns:
+        tuple: (burn counts per cell, burned cells per member, steps run)
+    """
+    spread_probability, ignition, steps, members, seed = task
+    rng = np.random.default_rng(seed)
+    rows, cols = ignition.shape
+
+    burning = np.broadcast_to(ignition, (members, rows, cols)).copy()
+    burned = burning.copy()
+    padded = np.zeros((members, rows + 2, cols + 2), dtype=bool)
+    not_ignited = np.empty((members, rows, cols), dtype=np.float32)
+
+    steps_run = 0
+    for _ in range(steps):
+        if not burning.any():
+            break
+
+        padded[:, 1:-1, 1:-1] = burning
+        not_ignited.fill(1.0)
+        for d, (dr, dc) in enumerate(NEIGHBORS):
+            neighbor_burning = padded[:, 1 + dr:1 + dr + rows, 1 + dc:1 + dc + cols]
+            not_ignited *= 1.0 - spread_probability[d] * neighbor_burning
+
+        # Burning cells burn out after one step; unburned cells may ignite
+        burning = ~burned & (rng.random((members, rows, cols), dtype=np.float32) >= not_ignited)
+        burned |= burning
+        steps_run += 1
+
+    return burned.sum(axis=0), burned.sum(axis=(1, 2)), steps_run
+
+
+class FireSpreadSimulator:
+    """
+    Class for projecting the spread of an active fire with a cellular automaton.
+    Spread between cells is driven by wind, slope and vegetation dryness, and
+    uncertainty is captured with a Monte Carlo ensemble of stochastic runs.
+    """
+
+    def __init__(self, predictor=None, cell_size=250, grid_size=101, workers=1):
+        """
+        Initialize the fire spread simulator
+
+        Args:
+            predictor: FireRiskPredictor supplying vegetation and terrain data
+            cell_size: Cell edge length in meters
+            grid_size: Number of cells along each side of the simulation grid
+            workers: Number of processes to spread ensemble members across
+        """
+        self.predictor = predictor or FireRiskPredictor()
+        self.cell_size = cell_size
+        self.grid_size = grid_size
+        self.workers = workers
+
+    def _grid_coordinates(self, lat, lng):
+        """Get (rows, cols) latitude and longitude arrays centred on a point"""
+        offsets = (np.arange(self.grid_size) - self.grid_size // 2) * self.cell_size
+        lat_step = offsets / METERS_PER_DEGREE
+        lng_step = offsets / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+
+        lats = lat - lat_step[:, None] * np.ones(self.grid_size)
+        lngs = lng + np.ones((self.grid_size, 1)) * lng_step[None, :]
+
+        return lats, lngs
+
+    def spread_probabilities(self, lats, lngs, weather):
+        """
+        Compute per-direction probability that a burning neighbor ignites each cell
+
+        Args:
+            lats, lngs: (rows, cols) cell-center coordinates
+            weather: Dictionary with wind_speed (km/h), wind_direction
+                (degrees the wind blows from), humidity and precipitation
+
+        Returns:
+            numpy array: (8, rows, cols) float32 probabilities in NEIGHBORS order
+        """
+        rows, cols = lats.shape
+        veg_dryness, _, elevation = self.predictor._synthetic_terrain(lats.ravel(), lngs.ravel())
+        veg_dryness = veg_dryness.reshape(rows, cols)
+        window = max(1, int(round(TERRAIN_SMOOTHING_M / self.cell_size)))
+        elevation = uniform_filter(elevation.reshape(rows, cols), size=window, mode='nearest')
+
+        # Fuel moisture: humid air and recent rain damp vegetation dryness
+        humidity = weather.get('humidity', WEATHER_DEFAULTS['humidity'])
+        precipitation = weather.get('precipitation', WEATHER_DEFAULTS['precipitation'])
+        moisture = max(0.0, 1.0 - 0.5 * humidity / 100.0 - min(precipitation, 10) / 20.0)
+        fuel = veg_dryness * moisture
+
+        wind_speed = weather.get('wind_speed', WEATHER_DEFAULTS['wind_speed']) / 3.6  # km/h to m/s
+        wind_to = math.radians((weather.get('wind_direction', 0) + 180) % 360)
+
+        padded_elevation = np.pad(elevation, 1, mode='edge')
+        probabilities = np.empty((len(NEIGHBORS), rows, cols), dtype=np.float32)
+
+        for d, (dr, dc) in enumerate(NEIGHBORS):
+            # Fire travels from the neighbor at (r+dr, c+dc) into cell (r, c)
+            spread_bearing = math.atan2(-dc, dr)
+            wind_factor = math.exp(wind_speed * (WIND_C1 + WIND_C2 * (math.cos(spread_bearing - wind_to) - 1)))
+
+            distance = self.cell_size * math.hypot(dr, dc)
+            rise = elevation - padded_elevation[1 + dr:1 + dr + rows, 1 + dc:1 + dc + cols]
+            slope = np.clip(np.degrees(np.arctan(rise / distance)), -MAX_SLOPE_DEGREES, MAX_SLOPE_DEGREES)
+            slope_factor = np.exp(SLOPE_A * slope)
+
+            probabilities[d] = np.clip(BASE_SPREAD_PROBABILITY * fuel * wind_factor * slope_factor, 0, 1)
+
+        return probabilities
+
+    def simulate(self, lat, lng, weather=None, steps=50, members=20, initial_radius=None, seed=None):
+        """
+        Simulate fire spread from an ignition point
+
+        Args:
+            lat, lng: Ignition location
+            weather: Weather dictionary (see spread_probabilities)
+            steps: Number of automaton steps to run
+            members: Number of Monte Carlo ensemble members
+            initial_radius: Radius in meters of the area already burning
+            seed: Seed for reproducible ensembles
+
+        Returns:
+            dict: Burn probability grid, grid coordinates and run statistics
+        """
+        if members < 1:
+            raise ValueError("members must be at least 1")
+
+        weather = weather or {}
+        lats, lngs = self._grid_coordinates(lat, lng)
+        probabilities = self.spread_probabilities(lats, lngs, weather)
+
+        center = self.grid_size // 2
+        radius_cells = (initial_radius or 0) / self.cell_size
+        r, c = np.ogrid[:self.grid_size, :self.grid_size]
+        ignition = (r - center) ** 2 + (c - center) ** 2 <= radius_cells ** 2
+
+        # Split ensemble members into one block per worker
+        workers = max(1, min(self.workers, members))
+        block_sizes = [len(block) for block in np.array_split(np.arange(members), workers)]
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        tasks = [(probabilities, ignition, steps, size, s) for size, s in zip(block_sizes, seeds)]
+
+        started = time.perf_counter()
+        if workers > 1:
+            results = list(_member_pool(self.workers).map(_run_members, tasks))
+        else:
+            results = [_run_members(task) for task in tasks]
+        elapsed = time.perf_counter() - started
+
+        burn_counts = sum(result[0] for result in results)
+        burned_cells = np.concatenate([result[1] for result in results])
+        cell_updates = sum(size * result[2] for size, result in zip(block_sizes, results)) * self.grid_size ** 2
+
+        cell_area_ha = self.cell_size ** 2 / 10000
+        stats = {
+            'members': members,
+            'steps': max(result[2] for result in results),
+            'elapsed_seconds': round(elapsed, 4),
+            'cells_per_second': round(cell_updates / elapsed, 1) if elapsed > 0 else None,
+            'mean_burned_area_ha': float(burned_cells.mean() * cell_area_ha),
+            'p90_burned_area_ha': float(np.percentile(burned_cells, 90) * cell_area_ha)
+        }
+
+        return {
+            'burn_probability': burn_counts / members,
+            'latitudes': lats,
+            'longitudes': lngs,
+            'stats': stats
+        }
+
+    def to_points(self, result, min_probability=0.05):
+        """
+        Convert a simulation result to [lat, lng, probability] points for map display
+
+        Returns:
+            list: Points for cells whose burn probability is at least min_probability
+        """
+        probability = result['burn_probability']
+        mask = probability >= min_probability
+
+        return np.column_stack([
+            result['latitudes'][mask],
+            result['longitudes'][mask],
+            probability[mask]
+        ]).round(5).tolist()
+
+    def downwind_shift(self, result, wind_direction):
+        """
+        Measure how far downwind of the ignition point the fire is expected to burn
+
+        Every cell counts in proportion to its burn probability, so ensemble
+        members where the fire dies out early weigh in rather than being
+        hidden behind the furthest-reaching member.
+
+        Args:
+            result: Result of simulate
+            wind_direction: Degrees the wind blows from
+
+        Returns:
+            float: Burn-probability-weighted mean downwind distance in meters
+        """
+        probability = result['burn_probability']
+        rows, cols = probability.shape
+        r, c = np.mgrid[:rows, :cols]
+        # Grid rows run north to south, so north is -row
+        wind_to = math.radians((wind_direction + 180) % 360)
+        along = ((c - cols // 2) * math.sin(wind_to) - (r - rows // 2) * math.cos(wind_to)) * self.cell_size
+
+        total = probability.sum()
+        return float((probability * along).sum() / total) if total > 0 else 0.0
+
+
+def check_wind_response(simulator=None, wind_speeds=(0, 20, 40, 60), wind_direction=270, **simulate_options):
+    """
+    Check that the burned area shifts further downwind as the wind strengthens
+
+    Args:
+        simulator: FireSpreadSimulator to check (default: a new one)
+        wind_speeds: Increasing wind speeds in km/h to simulate
+        wind_direction: Degrees the wind blows from
+        **simulate_options: Options passed to simulate (location, members, seed, ...)
+
+    Returns:
+        tuple: (passed, list of downwind shifts in meters per wind speed)
+    """
+    simulator = simulator or FireSpreadSimulator()
+    options = dict({'lat': 37.5, 'lng': -120.0, 'steps': 50, 'members': 20, 'seed': 1}, **simulate_options)
+    shifts = []
+    for wind_speed in wind_speeds:
+        result = simulator.simulate(weather={'wind_speed': wind_speed, 'wind_direction': wind_direction}, **options)
+        shifts.append(simulator.downwind_shift(result, wind_direction))
+
+    passed = all(later > earlier for earlier, later in zip(shifts, shifts[1:]))
+    return passed, shifts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check that simulated fire spread responds to wind')
+    parser.add_argument('--lat', type=float, default=37.5)
+    parser.add_argument('--lng', type=float, default=-120.0)
+    parser.add_argument('--wind-direction', type=float, default=270, help='Degrees the wind blows from')
+    parser.add_argument('--members', type=int, default=20)
+    args = parser.parse_args()
+
+    speeds = (0, 20, 40, 60)
+    passed, shifts = check_wind_response(wind_speeds=speeds, wind_direction=args.wind_direction,
+                                         lat=args.lat, lng=args.lng, members=args.members)
+    for speed, shift in zip(speeds, shifts):
+        print(f"wind {speed:3d} km/h: burned area centred {shift / 1000:6.2f} km downwind")
+    print("Downwind spread grows with wind speed" if passed else "FAIL: downwind spread does not grow with wind speed")
+    sys.exit(0 if passed else 1)
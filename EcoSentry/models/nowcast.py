@@ -0,0 +1,340 @@
+import numpy as np
+import json
+import os
+import math
+import threading
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from models.fire_predictor import FireRiskPredictor, WEATHER_FEATURES, init_worker, worker_predictor
+
+# Risk color scale, matching EcoSentry.utils.getRiskColor in static/js/main.js
+RISK_COLORS = [
+    (0.9, (215, 48, 39)),   # Extreme
+    (0.8, (252, 141, 89)),  # High
+    (0.6, (254, 224, 139)), # Medium
+    (0.4, (217, 239, 139)), # Low
+    (0.0, (145, 207, 96))   # Very low
+]
+
+def _evaluate_chunk(task):
+    """
+    Evaluate the risk model over a block of grid rows and write the result
+    straight into the memory-mapped output raster.
+
+    Args:
+        task: Tuple of (weather_dir, raster_path, grid, row_start, row_end, date)
+
+    Returns:
+        int: Number of cells evaluated
+    """
+    weather_dir, raster_path, grid, row_start, row_end, date = task
+    predictor = worker_predictor()
+
+    rows = row_end - row_start
+    cols = grid['shape'][1]
+    lats, lngs = grid_coordinates(grid, row_start, row_end)
+
+    data = {
+        'latitude': np.repeat(lats, cols),
+        'longitude': np.tile(lngs, rows)
+    }
+    for name in WEATHER_FEATURES:
+        path = os.path.join(weather_dir, f'{name}.npy')
+        if os.path.exists(path):
+            # Only the pages for this block are read from disk
+            weather = np.load(path, mmap_mode='r')
+            data[name] = np.asarray(weather[row_start:row_end], dtype=np.float64).ravel()
+
+    risk = predictor.predict_batch(data, date=date)
+
+    raster = np.load(raster_path, mmap_mode='r+')
+    raster[row_start:row_end] = risk.reshape(rows, cols)
+    raster.flush()
+    del raster
+
+    return rows * cols
+
+
+def load_grid(weather_dir):
+    """
+    Load the grid header describing a directory of gridded weather arrays.
+
+    The directory holds a grid.json header with the grid bounds and an
+    optional forecast date, plus one (rows, cols) .npy array per weather
+    variable (temperature.npy, humidity.npy, wind_speed.npy,
+    precipitation.npy). Row 0 is the northern edge of the grid.
+
+    Returns:
+        dict: Grid header including 'bounds' and 'shape'
+    """
+    with open(os.path.join(weather_dir, 'grid.json'), 'r') as f:
+        grid = json.load(f)
+
+    if 'shape' not in grid:
+        for name in WEATHER_FEATURES:
+            path = os.path.join(weather_dir, f'{name}.npy')
+            if os.path.exists(path):
+                grid['shape'] = list(np.load(path, mmap_mode='r').shape)
+                break
+        else:
+            raise ValueError(f"No weather arrays found in {weather_dir}")
+
+    for name in WEATHER_FEATURES:
+        path = os.path.join(weather_dir, f'{name}.npy')
+        if os.path.exists(path) and list(np.load(path, mmap_mode='r').shape) != list(grid['shape']):
+            raise ValueError(f"{name}.npy does not match grid shape {grid['shape']}")
+
+    return grid
+
+
+def grid_coordinates(grid, row_start=0, row_end=None):
+    """
+    Get cell-center coordinates for a block of grid rows
+
+    Returns:
+        tuple: (latitudes for rows row_start..row_end, longitudes for all columns)
+    """
+    rows, cols = grid['shape']
+    bounds = grid['bounds']
+    row_end = rows if row_end is None else row_end
+
+    lat_step = (bounds['north'] - bounds['south']) / rows
+    lng_step = (bounds['east'] - bounds['west']) / cols
+
+    lats = bounds['north'] - (np.arange(row_start, row_end) + 0.5) * lat_step
+    lngs = bounds['west'] + (np.arange(cols) + 0.5) * lng_step
+
+    return lats, lngs
+
+
+class RiskNowcastEngine:
+    """
+    Evaluates the fire risk model over every cell of a weather grid and
+    publishes the result as a memory-mapped float32 raster, one per
+    forecast cycle.
+    """
+
+    def __init__(self, predictor=None, output_dir='data/nowcast', chunk_rows=64, workers=None, keep_cycles=3):
+        """
+        Initialize the nowcast engine
+
+        Args:
+            predictor: FireRiskPredictor to evaluate (a demo model if None)
+            output_dir: Directory where rasters and cycle metadata are written
+            chunk_rows: Number of grid rows evaluated per batch
+            workers: Number of worker processes (defaults to the CPU count)
+            keep_cycles: Number of past cycles to keep on disk
+        """
+        self.predictor = predictor or FireRiskPredictor()
+        self.output_dir = output_dir
+        self.chunk_rows = chunk_rows
+        self.workers = workers or os.cpu_count() or 1
+        self.keep_cycles = keep_cycles
+
+    def run(self, weather_dir, cycle_time=None):
+        """
+        Produce the risk raster for one forecast cycle
+
+        Args:
+            weather_dir: Directory of gridded weather arrays (see load_grid)
+            cycle_time: Cycle datetime (defaults to the current UTC hour)
+
+        Returns:
+            dict: Metadata of the published cycle
+        """
+        grid = load_grid(weather_dir)
+        rows, cols = grid['shape']
+
+        if cycle_time is None:
+            cycle_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        cycle = cycle_time.strftime('%Y%m%dT%H%M')
+        date = grid.get('date', cycle_time.strftime('%Y-%m-%d'))
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        raster_name = f'risk_{cycle}.npy'
+        raster_path = os.path.join(self.output_dir, raster_name)
+        partial_path = raster_path + '.partial'
+
+        # Allocate the output raster on disk; workers write their rows into it
+        raster = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.float32, shape=(rows, cols))
+        del raster
+
+        tasks = [
+            (weather_dir, partial_path, grid, start, min(start + self.chunk_rows, rows), date)
+            for start in range(0, rows, self.chunk_rows)
+        ]
+
+        started = datetime.now()
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                     initargs=(self.predictor,)) as pool:
+                cells = sum(pool.map(_evaluate_chunk, tasks))
+        else:
+            init_worker(self.predictor)
+            cells = sum(_evaluate_chunk(task) for task in tasks)
+        elapsed = (datetime.now() - started).total_seconds()
+
+        os.replace(partial_path, raster_path)
+
+        metadata = {
+            'cycle': cycle,
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'date': date,
+            'raster': raster_name,
+            'shape': [rows, cols],
+            'bounds': grid['bounds'],
+            'cells': cells,
+            'elapsed_seconds': round(elapsed, 3),
+            'cells_per_second': round(cells / elapsed, 1) if elapsed > 0 else None
+        }
+
+        # Publish the cycle by atomically replacing the latest pointer
+        _write_json(os.path.join(self.output_dir, f'risk_{cycle}.json'), metadata)
+        _write_json(os.path.join(self.output_dir, 'latest.json'), metadata)
+
+        self._prune_cycles()
+
+        return metadata
+
+    def _prune_cycles(self):
+        """Remove rasters from cycles older than the most recent keep_cycles"""
+        cycles = sorted(
+            name[len('risk_'):-len('.json')]
+            for name in os.listdir(self.output_dir)
+            if name.startswith('risk_') and name.endswith('.json')
+        )
+        for cycle in cycles[:-self.keep_cycles]:
+            for ext in ('.npy', '.json'):
+                path = os.path.join(self.output_dir, f'risk_{cycle}{ext}')
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def _write_json(path, data):
+    """Write JSON so that readers never observe a partially written file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RiskRaster:
+    """
+    Read-only view of the latest published nowcast raster.
+
+    The raster is memory-mapped rather than loaded, so point queries and
+    tile rendering only touch the pages they need. A new cycle is picked up
+    automatically when latest.json changes.
+    """
+
+    def __init__(self, output_dir='data/nowcast'):
+        """Initialize the reader for rasters published to output_dir"""
+        self.output_dir = output_dir
+        self.metadata = None
+        self.raster = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Re-open the raster if a newer cycle has been published
+
+        Returns:
+            bool: True if a raster is available
+        """
+        latest_path = os.path.join(self.output_dir, 'latest.json')
+        try:
+            mtime = os.path.getmtime(latest_path)
+        except OSError:
+            return self.raster is not None
+
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with open(latest_path, 'r') as f:
+                        metadata = json.load(f)
+                    raster = np.load(os.path.join(self.output_dir, metadata['raster']), mmap_mode='r')
+                    self.metadata, self.raster, self._mtime = metadata, raster, mtime
+
+        return self.raster is not None
+
+    def sample(self, lats, lngs):
+        """
+        Look up risk scores for arrays of coordinates
+
+        Returns:
+            numpy array: Risk scores (float32), NaN outside the grid
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        result = np.full(lats.shape, np.nan, dtype=np.float32)
+        if not self.refresh():
+            return result
+
+        raster = self.raster
+        bounds = self.metadata['bounds']
+        rows, cols = raster.shape
+
+        row = np.floor((bounds['north'] - lats) / (bounds['north'] - bounds['south']) * rows)
+        col = np.floor((lngs - bounds['west']) / (bounds['east'] - bounds['west']) * cols)
+        inside = (row >= 0) & (row < rows) & (col >= 0) & (col < cols)
+
+        result[inside] = raster[row[inside].astype(np.intp), col[inside].astype(np.intp)]
+        return result
+
+    def value_at(self, lat, lng):
+        """
+        Look up the risk score of the cell containing a point
+
+        Returns:
+            float or None: Risk score, or None outside the grid
+        """
+        value = self.sample([lat], [lng])[0]
+        return None if np.isnan(value) else float(value)
+
+    def render_tile(self, z, x, y, size=256):
+        """
+        Render a Web Mercator (XYZ) map tile of the raster
+
+        Returns:
+            numpy array: (size, size, 4) uint8 RGBA image, transparent outside the grid
+        """
+        n = 2 ** z
+        pixels = (np.arange(size) + 0.5) / size
+        lngs = (x + pixels) / n * 360.0 - 180.0
+        lats = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * (y + pixels) / n))))
+
+        risk = self.sample(lats[:, None] * np.ones(size), np.ones((size, 1)) * lngs[None, :])
+
+        tile = np.zeros((size, size, 4), dtype=np.uint8)
+        valid = ~np.isnan(risk)
+        assigned = np.zeros_like(valid)
+        for threshold, color in RISK_COLORS:
+            mask = valid & ~assigned & (risk >= threshold)
+            tile[mask, :3] = color
+            assigned |= mask
+        tile[valid, 3] = 160
+
+        return tile
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Produce a fire risk nowcast raster from gridded weather data')
+    parser.add_argument('weather_dir', help='Directory with grid.json and per-variable .npy arrays')
+    parser.add_argument('--output', default=os.path.join('data', 'nowcast'), help='Raster output directory')
+    parser.add_argument('--model', default=None, help='Path to a trained risk model')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-rows', type=int, default=64, help='Grid rows per batch')
+    args = parser.parse_args()
+
+    engine = RiskNowcastEngine(
+        predictor=FireRiskPredictor(args.model),
+        output_dir=args.output,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers
+    )
+    metadata = engine.run(args.weather_dir)
+    print(f"Cycle {metadata['cycle']}: {metadata['cells']} cells in "
+          f"{metadata['elapsed_seconds']}s ({metadata['cells_per_second']} cells/s)")
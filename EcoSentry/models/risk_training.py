@@ -0,0 +1,374 @@
+import numpy as np
+import json
+import os
+import zlib
+import hashlib
+import logging
+import argparse
+import joblib
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+from data.data_processor import FireDataProcessor
+from data.weather_store import WeatherStore
+from models.fire_predictor import FireRiskPredictor, FEATURE_NAMES, init_worker, worker_predictor
+
+logger = logging.getLogger(__name__)
+
+# Bump when feature building changes so cached partitions are rebuilt
+FEATURE_VERSION = 1
+
+# Date used for historical fires that only record a year (peak of the fire season)
+FIRE_SEASON_DATE = '07-15'
+
+# Model types accepted by RiskModelTrainer.train
+MODEL_TYPES = ('random_forest', 'xgboost')
+
+def _build_chunk(task):
+    """
+    Build the features for a block of samples and write them straight into
+    the memory-mapped partition file.
+
+    Args:
+        task: Tuple of (partition_path, start, latitudes, longitudes, times, labels)
+
+    Returns:
+        int: Number of rows written
+    """
+    partition_path, start, lats, lngs, times, labels = task
+    rows = lats.size
+
+    features = worker_predictor()._build_feature_matrix({'latitude': lats, 'longitude': lngs}, rows, time=times)
+
+    output = np.load(partition_path, mmap_mode='r+')
+    output[start:start + rows, :-1] = features
+    output[start:start + rows, -1] = labels
+    output.flush()
+    del output
+
+    return rows
+
+
+def _fire_date(fire):
+    """Get the ignition date of a historical fire record"""
+    date = fire.get('date') or fire.get('started')
+    if date:
+        return date
+    return f"{fire['year']}-{FIRE_SEASON_DATE}"
+
+
+class RiskModelTrainer:
+    """
+    Trains the fire risk model on historical fires joined with weather and
+    terrain features.
+
+    Each historical fire is a positive sample. It is paired with
+    negative_ratio background samples at random locations on the same dates,
+    so the model learns where fires occur rather than when. Samples are
+    partitioned by fire year. Each partition's features are built in chunks
+    by a process pool and checkpointed to a float32 .npy file in cache_dir,
+    together with a fingerprint of its inputs. Re-training after new fires
+    are added only rebuilds the partitions whose fingerprint changed.
+    """
+
+    def __init__(self, processor=None, cache_dir='data/training', weather_store=None, weather_id='',
+                 negative_ratio=3, bounds=None, chunk_rows=50000, workers=None, seed=0):
+        """
+        Initialize the trainer
+
+        Args:
+            processor: FireDataProcessor holding the historical fires
+            cache_dir: Directory for checkpointed feature partitions
+            weather_store: WeatherStore covering the historical period; weather
+                falls back to the predictor defaults where it has no match
+            weather_id: Identifies the weather data in partition fingerprints,
+                so that changing it rebuilds the features
+            negative_ratio: Background samples per fire
+            bounds: Dict with north/south/east/west to draw background
+                locations from (default: each partition's fire extent plus
+                one degree)
+            chunk_rows: Samples per feature-building task
+            workers: Number of worker processes (defaults to the CPU count)
+            seed: Seed for background sampling
+        """
+        self.processor = processor or FireDataProcessor()
+        self.cache_dir = cache_dir
+        self.weather_store = weather_store
+        self.weather_id = weather_id
+        self.negative_ratio = negative_ratio
+        self.bounds = bounds
+        self.chunk_rows = chunk_rows
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+
+    def partitions(self):
+        """
+        Group the historical fires by year
+
+        Returns:
+            dict: Partition key (year) to list of fire records
+        """
+        partitions = {}
+        for fire in self.processor.historical_fires or []:
+            date = fire.get('date') or fire.get('started')
+            if fire.get('location') is None or (fire.get('year') is None and not date):
+                continue
+            year = fire.get('year') or int(str(date)[:4])
+            partitions.setdefault(str(year), []).append(fire)
+        return partitions
+
+    def _background_bounds(self, fires):
+        """
+        Area that a partition's background samples are drawn from
+
+        Derived from the partition's own fires, so adding fires to one year
+        never changes the samples (or fingerprint) of another.
+        """
+        if self.bounds is not None:
+            return self.bounds
+
+        lats = [fire['location']['lat'] for fire in fires]
+        lngs = [fire['location']['lng'] for fire in fires]
+        return {
+            'north': max(lats) + 1, 'south': min(lats) - 1,
+            'east': max(lngs) + 1, 'west': min(lngs) - 1
+        }
+
+    def _fingerprint(self, fires, bounds):
+        """Hash everything that determines a partition's features"""
+        content = json.dumps({
+            'version': FEATURE_VERSION,
+            'fires': sorted(fires, key=lambda fire: str(fire.get('id'))),
+            'negative_ratio': self.negative_ratio,
+            'bounds': bounds,
+            'weather': self.weather_id,
+            'seed': self.seed
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def _samples(self, key, fires, bounds):
+        """
+        Positive and background samples of one partition
+
+        Returns:
+            tuple: (latitudes, longitudes, times, labels) arrays
+        """
+        fire_lats = np.array([fire['location']['lat'] for fire in fires], dtype=np.float64)
+        fire_lngs = np.array([fire['location']['lng'] for fire in fires], dtype=np.float64)
+        fire_times = np.array([_fire_date(fire) for fire in fires], dtype='datetime64[s]')
+
+        # Background locations on the fires' dates, seeded per partition so
+        # a rebuilt partition is reproducible
+        rng = np.random.default_rng([self.seed, zlib.crc32(key.encode('utf-8'))])
+        count = len(fires) * self.negative_ratio
+        background_lats = rng.uniform(bounds['south'], bounds['north'], count)
+        background_lngs = rng.uniform(bounds['west'], bounds['east'], count)
+
+        return (
+            np.concatenate([fire_lats, background_lats]),
+            np.concatenate([fire_lngs, background_lngs]),
+            np.concatenate([fire_times, np.tile(fire_times, self.negative_ratio)]),
+            np.concatenate([np.ones(len(fires)), np.zeros(count)]).astype(np.float32)
+        )
+
+    def _manifest_path(self, key):
+        return os.path.join(self.cache_dir, f'features_{key}.json')
+
+    def _partition_path(self, key):
+        return os.path.join(self.cache_dir, f'features_{key}.npy')
+
+    def _is_current(self, key, fingerprint):
+        """Check whether a partition's checkpoint matches its inputs"""
+        manifest_path = self._manifest_path(key)
+        if not os.path.exists(manifest_path) or not os.path.exists(self._partition_path(key)):
+            return False
+        with open(manifest_path, 'r') as f:
+            return json.load(f).get('fingerprint') == fingerprint
+
+    def build_features(self):
+        """
+        Build and checkpoint the features of every partition that is missing
+        or out of date
+
+        Returns:
+            dict: 'partitions' (key to .npy path), 'built' and 'cached' partition keys
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        partitions = self.partitions()
+        bounds = {key: self._background_bounds(fires) for key, fires in partitions.items()}
+
+        stale = {}
+        for key, fires in partitions.items():
+            fingerprint = self._fingerprint(fires, bounds[key])
+            if not self._is_current(key, fingerprint):
+                stale[key] = fingerprint
+
+        # Allocate each stale partition on disk; workers write their chunks into it
+        tasks = []
+        for key in stale:
+            lats, lngs, times, labels = self._samples(key, partitions[key], bounds[key])
+            partial_path = self._partition_path(key) + '.partial'
+            output = np.lib.format.open_memmap(partial_path, mode='w+', dtype=np.float32,
+                                               shape=(lats.size, len(FEATURE_NAMES) + 1))
+            del output
+            for start in range(0, lats.size, self.chunk_rows):
+                end = start + self.chunk_rows
+                tasks.append((partial_path, start, lats[start:end], lngs[start:end],
+                              times[start:end], labels[start:end]))
+
+        predictor = FireRiskPredictor(weather_store=self.weather_store)
+        started = datetime.now()
+        if self.workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                     initargs=(predictor,)) as pool:
+                rows = sum(pool.map(_build_chunk, tasks))
+        else:
+            init_worker(predictor)
+            rows = sum(_build_chunk(task) for task in tasks)
+        elapsed = (datetime.now() - started).total_seconds()
+
+        # Publish each rebuilt partition, then its manifest
+        for key, fingerprint in stale.items():
+            os.replace(self._partition_path(key) + '.partial', self._partition_path(key))
+            with open(self._manifest_path(key), 'w') as f:
+                json.dump({'partition': key, 'fingerprint': fingerprint, 'fires': len(partitions[key])}, f)
+
+        logger.info(f"Built {len(stale)} feature partitions ({rows} rows in {elapsed:.2f}s), "
+                    f"{len(partitions) - len(stale)} cached")
+
+        return {
+            'partitions': {key: self._partition_path(key) for key in sorted(partitions)},
+            'built': sorted(stale),
+            'cached': sorted(set(partitions) - set(stale))
+        }
+
+    def load_training_set(self, paths):
+        """
+        Assemble the training set from feature partitions
+
+        The scaler is fitted incrementally over the memory-mapped partitions,
+        then each partition is scaled straight into one float32 matrix, so
+        only the final training matrix is held in memory.
+
+        Returns:
+            tuple: (scaled features, labels, fitted StandardScaler)
+        """
+        partitions = [np.load(path, mmap_mode='r') for path in paths]
+
+        scaler = StandardScaler()
+        for partition in partitions:
+            for start in range(0, len(partition), self.chunk_rows):
+                scaler.partial_fit(partition[start:start + self.chunk_rows, :-1])
+
+        rows = sum(len(partition) for partition in partitions)
+        X = np.empty((rows, len(FEATURE_NAMES)), dtype=np.float32)
+        y = np.empty(rows, dtype=np.int8)
+        offset = 0
+        for partition in partitions:
+            for start in range(0, len(partition), self.chunk_rows):
+                chunk = partition[start:start + self.chunk_rows]
+                X[offset:offset + len(chunk)] = scaler.transform(chunk[:, :-1])
+                y[offset:offset + len(chunk)] = chunk[:, -1]
+                offset += len(chunk)
+
+        return X, y, scaler
+
+    def train(self, model_type='random_forest', output_path=None, n_estimators=200, min_samples_leaf=20, n_jobs=-1):
+        """
+        Build features as needed and train the risk model on all partitions
+
+        Args:
+            model_type: 'random_forest' or 'xgboost'
+            output_path: Where to save the model bundle (not saved if None)
+            n_estimators: Number of trees
+            min_samples_leaf: Smallest random forest leaf; larger leaves give
+                smoother risk probabilities and faster training
+            n_jobs: Parallel training jobs (-1 for all cores)
+
+        Returns:
+            dict: Model bundle with 'model', 'scaler', 'feature_names' and 'metadata'
+        """
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type}")
+
+        features = self.build_features()
+        if not features['partitions']:
+            raise ValueError("No historical fires to train on")
+
+        X, y, scaler = self.load_training_set(features['partitions'].values())
+        if self.weather_store is None:
+            logger.warning("Training WITHOUT weather: every weather feature is the predictor default, so the "
+                           "model learns nothing from weather. Pass a weather_store covering the fires.")
+
+        if model_type == 'xgboost':
+            try:
+                from xgboost import XGBClassifier
+            except ImportError:
+                raise ImportError("model_type='xgboost' requires the xgboost package")
+            model = XGBClassifier(n_estimators=n_estimators, tree_method='hist', n_jobs=n_jobs,
+                                  random_state=self.seed)
+        else:
+            model = RandomForestClassifier(n_estimators=n_estimators, min_samples_leaf=min_samples_leaf,
+                                           n_jobs=n_jobs, random_state=self.seed)
+
+        started = datetime.now()
+        model.fit(X, y)
+        elapsed = (datetime.now() - started).total_seconds()
+
+        metadata = {
+            'trained_at': datetime.now(timezone.utc).isoformat(),
+            'model_type': model_type,
+            'weather': self.weather_store is not None,
+            'rows': int(len(y)),
+            'positives': int(y.sum()),
+            'partitions': sorted(features['partitions']),
+            'rebuilt_partitions': features['built'],
+            'training_seconds': round(elapsed, 3),
+            'feature_importance': dict(zip(FEATURE_NAMES, np.round(model.feature_importances_, 4).tolist()))
+        }
+        bundle = {'model': model, 'scaler': scaler, 'feature_names': FEATURE_NAMES, 'metadata': metadata}
+
+        if output_path:
+            joblib.dump(bundle, output_path)
+            logger.info(f"Saved {model_type} risk model to {output_path}")
+
+        return bundle
+
+
+# Example usage
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Train the fire risk model on historical fires')
+    parser.add_argument('--data-dir', default=os.path.join('data', 'sample_data'), help='Directory with risk_data.json')
+    parser.add_argument('--weather-dir', default=None,
+                        help='Historical weather grid (grid.json with times and (times, rows, cols) arrays)')
+    parser.add_argument('--no-weather', action='store_true',
+                        help='Train without weather (weather features get no importance)')
+    parser.add_argument('--cache-dir', default=os.path.join('data', 'training'), help='Feature partition cache')
+    parser.add_argument('--output', default=os.path.join('models', 'fire_risk_model.joblib'), help='Model output path')
+    parser.add_argument('--model-type', choices=MODEL_TYPES, default='random_forest')
+    parser.add_argument('--estimators', type=int, default=200, help='Number of trees')
+    parser.add_argument('--negative-ratio', type=int, default=3, help='Background samples per fire')
+    parser.add_argument('--workers', type=int, default=None, help='Feature-building processes (default: CPU count)')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Model training jobs (-1 for all cores)')
+    args = parser.parse_args()
+    if not args.weather_dir and not args.no_weather:
+        parser.error('--weather-dir is required (pass --no-weather to train on terrain only)')
+
+    weather_store, weather_id = None, ''
+    if args.weather_dir:
+        # Only weather within a day of a sample counts; older gaps use defaults
+        weather_store = WeatherStore.load(args.weather_dir, time_tolerance=np.timedelta64(1, 'D'))
+        weather_id = f"{os.path.abspath(args.weather_dir)}:{os.path.getmtime(os.path.join(args.weather_dir, 'grid.json'))}"
+
+    trainer = RiskModelTrainer(
+        FireDataProcessor(args.data_dir),
+        cache_dir=args.cache_dir,
+        weather_store=weather_store,
+        weather_id=weather_id,
+        negative_ratio=args.negative_ratio,
+        workers=args.workers
+    )
+    bundle = trainer.train(args.model_type, args.output, n_estimators=args.estimators, n_jobs=args.n_jobs)
+    print(json.dumps(bundle['metadata'], indent=2))
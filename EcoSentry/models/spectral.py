@@ -0,0 +1,133 @@
+import numpy as np
+import ast
+
+
+def read_npy_buffer(buffer):
+    """
+    Wrap an in-memory .npy file as an array without copying the data
+
+    Args:
+        buffer: bytes, bytearray or memoryview holding a .npy file
+
+    Returns:
+        numpy array: Read-only view onto buffer
+    """
+    view = memoryview(buffer)
+    if len(view) < 10 or bytes(view[:6]) != b'\x93NUMPY':
+        raise ValueError("Not a .npy buffer")
+
+    major = view[6]
+    if major == 1:
+        header_len = int.from_bytes(view[8:10], 'little')
+        offset = 10 + header_len
+    else:
+        header_len = int.from_bytes(view[8:12], 'little')
+        offset = 12 + header_len
+
+    try:
+        header = ast.literal_eval(bytes(view[offset - header_len:offset]).decode('latin1'))
+        if not isinstance(header, dict):
+            raise ValueError("header is not a dictionary")
+        if not isinstance(header.get('descr'), (str, list)) or not isinstance(header.get('fortran_order'), bool):
+            raise ValueError("missing or invalid descr/fortran_order")
+        shape = header.get('shape')
+        if not isinstance(shape, tuple) or not all(isinstance(dim, int) and dim >= 0 for dim in shape):
+            raise ValueError("missing or invalid shape")
+        dtype = np.dtype(header['descr'])
+    except (SyntaxError, ValueError, TypeError, MemoryError, RecursionError) as e:
+        raise ValueError(f"invalid .npy header: {e}")
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not supported")
+
+    count = int(np.prod(shape))
+    array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+    order = 'F' if header['fortran_order'] else 'C'
+    return array.reshape(shape, order=order)
+
+
+def read_raw_buffer(buffer, shape, dtype):
+    """
+    Wrap a raw (headerless) pixel buffer as an array without copying
+
+    Args:
+        buffer: bytes-like object holding the pixels in C order
+        shape: Array shape, e.g. (height, width, bands)
+        dtype: Pixel data type, e.g. 'uint16'
+
+    Returns:
+        numpy array: Read-only view onto buffer
+    """
+    dtype = np.dtype(dtype)
+    count = int(np.prod(shape))
+    if len(memoryview(buffer).cast('B')) != count * dtype.itemsize:
+        raise ValueError(f"Buffer size does not match shape {tuple(shape)} and dtype {dtype}")
+    return np.frombuffer(buffer, dtype=dtype, count=count).reshape(shape)
+
+
+def open_array(path, shape=None, dtype=None, offset=0):
+    """
+    Memory-map a multispectral tile from disk
+
+    Args:
+        path: .npy file, or a raw file when shape and dtype are given
+        shape, dtype: Layout of a raw file
+        offset: Byte offset of the pixel data in a raw file
+
+    Returns:
+        numpy array: Read-only memory-mapped array
+    """
+    if shape is None:
+        return np.load(path, mmap_mode='r')
+    return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape), offset=offset)
+
+
+def prepare_bands(array, size, bands=None, scale=None, channels_first=False):
+    """
+    Select bands, resample and normalize a multispectral tile for the model
+
+    Band selection and resampling are a single gather that reads only the
+    output pixels, so a memory-mapped tile is never loaded in full.
+    Normalization then runs in place on the float32 result.
+
+    Args:
+        array: (height, width, bands) array, or (bands, height, width) if
+            channels_first
+        size: Output (width, height)
+        bands: Indices of the bands to keep, in model input order (all if None)
+        scale: Divide values by this (e.g. 10000 for reflectance); if None,
+            each band is min-max scaled to [0, 1]
+
+    Returns:
+        numpy array: float32 array of shape (height, width, len(bands))
+    """
+    if scale is not None and not scale > 0:
+        raise ValueError(f"Scale must be positive, got {scale}")
+
+    if array.ndim == 2:
+        array = array[:, :, np.newaxis]
+    if channels_first:
+        array = np.moveaxis(array, 0, -1)  # A view, not a copy
+
+    height, width, band_count = array.shape
+    bands = np.arange(band_count) if bands is None else np.asarray(bands, dtype=np.intp)
+    if bands.size == 0 or bands.min() < -band_count or bands.max() >= band_count:
+        raise ValueError(f"Band indices {bands.tolist()} out of range for {band_count} bands")
+
+    # Nearest-neighbour sample positions at the output pixel centers
+    out_width, out_height = size
+    rows = ((np.arange(out_height) + 0.5) * height / out_height).astype(np.intp)
+    cols = ((np.arange(out_width) + 0.5) * width / out_width).astype(np.intp)
+
+    sampled = array[rows[:, None, None], cols[None, :, None], bands[None, None, :]]
+    result = sampled.astype(np.float32, copy=False)
+
+    if scale is not None:
+        result *= np.float32(1.0 / scale)
+    else:
+        minimum = result.min(axis=(0, 1))
+        result -= minimum
+        spread = result.max(axis=(0, 1))
+        spread[spread == 0] = 1
+        result /= spread
+
+    return result
@@ -0,0 +1,188 @@
+import numpy as np
+from PIL import Image, ImageSequence
+import io
+import os
+import time
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def iter_video_frames(video_data):
+    """
+    Lazily decode frames from a video or multi-frame image
+
+    Animated GIF/WebP/PNG and multi-page TIFF are decoded with PIL. Other
+    containers (MP4, AVI, ...) need OpenCV (opencv-python-headless).
+
+    Args:
+        video_data: File object or bytes
+
+    Yields:
+        tuple: (timestamp in seconds, PIL RGB image)
+    """
+    data = video_data.read() if hasattr(video_data, 'read') else video_data
+
+    try:
+        image = Image.open(io.BytesIO(data))
+    except Exception:
+        image = None
+
+    if image is not None:
+        timestamp = 0.0
+        for frame in ImageSequence.Iterator(image):
+            yield timestamp, frame.convert('RGB')
+            timestamp += frame.info.get('duration', 0) / 1000.0
+        return
+
+    try:
+        import cv2
+    except ImportError:
+        raise ValueError("Unsupported video format; install opencv-python-headless to decode video files")
+
+    # OpenCV only reads from paths, so spool the upload to a temporary file
+    with tempfile.NamedTemporaryFile(suffix='.video', delete=False) as f:
+        f.write(data)
+        path = f.name
+
+    capture = cv2.VideoCapture(path)
+    try:
+        if not capture.isOpened():
+            raise ValueError("Could not decode video")
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            yield timestamp, Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    finally:
+        capture.release()
+        os.remove(path)
+
+
+def iter_image_frames(images, fps=1.0):
+    """
+    Lazily decode a sequence of individual frame images
+
+    Args:
+        images: Iterable of image file objects or bytes, in frame order
+        fps: Frame rate used to timestamp the frames
+
+    Yields:
+        tuple: (timestamp in seconds, PIL RGB image)
+    """
+    for index, image_data in enumerate(images):
+        if hasattr(image_data, 'read'):
+            image = Image.open(image_data)
+        else:
+            image = Image.open(io.BytesIO(image_data))
+        yield index / fps, image.convert('RGB')
+
+
+class StreamDetector:
+    """
+    Runs a FireDetector over a stream of frames, skipping inference on frames
+    that barely differ from the last scored frame and batching the rest.
+    Throughput therefore grows with how still the scene is.
+    """
+
+    def __init__(self, detector, diff_threshold=0.02, batch_size=16, max_skip=30, thumbnail_size=(32, 32)):
+        """
+        Initialize the stream detector
+
+        Args:
+            detector: FireDetector used to score frames
+            diff_threshold: Mean absolute difference (0-1) of downsampled
+                grayscale frames below which a frame reuses the last result
+            batch_size: Number of frames scored per model call
+            max_skip: Score at least every max_skip frames even in a still scene
+            thumbnail_size: Size frames are downsampled to for differencing
+        """
+        self.detector = detector
+        self.diff_threshold = diff_threshold
+        self.batch_size = batch_size
+        self.max_skip = max_skip
+        self.thumbnail_size = thumbnail_size
+
+    def _thumbnail(self, image):
+        """Downsample a frame to a small grayscale float array for differencing"""
+        thumbnail = image.convert('L').resize(self.thumbnail_size, Image.BILINEAR)
+        return np.asarray(thumbnail, dtype=np.float32) / 255.0
+
+    def track(self, frames):
+        """
+        Detect fires across a frame stream
+
+        Args:
+            frames: Iterable of (timestamp, PIL image), e.g. from iter_video_frames
+
+        Yields:
+            dict: One detection per frame, in order, with 'frame', 'time',
+                'scored' (False if the result was reused from 'source_frame')
+                and the usual has_fire/confidence/regions fields
+        """
+        last_thumbnail = None
+        since_scored = 0
+        pending = []   # Frame entries awaiting a result, in order
+        batch = []     # (entry, image) pairs to score in the next model call
+
+        for index, (timestamp, image) in enumerate(frames):
+            thumbnail = self._thumbnail(image)
+            entry = {'frame': index, 'time': round(timestamp, 3)}
+
+            if (last_thumbnail is not None and since_scored < self.max_skip
+                    and np.mean(np.abs(thumbnail - last_thumbnail)) < self.diff_threshold):
+                # Reuse the result of the last scored frame
+                entry['scored'] = False
+                entry['source_frame'] = scored_entry['frame']
+                entry['_source'] = scored_entry
+                since_scored += 1
+            else:
+                entry['scored'] = True
+                batch.append((entry, image))
+                scored_entry = entry
+                last_thumbnail = thumbnail
+                since_scored = 0
+            pending.append(entry)
+
+            if len(batch) >= self.batch_size:
+                yield from self._flush(pending, batch)
+                pending, batch = [], []
+
+        yield from self._flush(pending, batch)
+
+    def _flush(self, pending, batch):
+        """Score the batched frames and emit all pending entries in order"""
+        if batch:
+            results = self.detector.detect_batch([image for _, image in batch])
+            for (entry, _), result in zip(batch, results):
+                entry.update(result)
+
+        for entry in pending:
+            source = entry.pop('_source', None)
+            if source is not None:
+                entry.update({key: source[key] for key in ('has_fire', 'confidence', 'regions')})
+            yield entry
+
+    def run(self, frames):
+        """
+        Detect fires across a frame stream and collect the full track
+
+        Returns:
+            dict: 'track' list of per-frame detections and throughput 'stats'
+        """
+        started = time.perf_counter()
+        track = list(self.track(frames))
+        elapsed = time.perf_counter() - started
+
+        scored = sum(1 for entry in track if entry['scored'])
+        stats = {
+            'frames': len(track),
+            'scored_frames': scored,
+            'skipped_frames': len(track) - scored,
+            'elapsed_seconds': round(elapsed, 4),
+            'frames_per_second': round(len(track) / elapsed, 1) if elapsed > 0 else None
+        }
+
+        return {'track': track, 'stats': stats}
@@ -0,0 +1,172 @@
+import numpy as np
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Supported post-training quantization modes for export
+QUANTIZATION_MODES = (None, 'float16', 'int8')
+
+
+def _interpreter_class():
+    """
+    Find the lightest available TFLite interpreter.
+
+    Prefers the standalone tflite-runtime (or LiteRT) package, which does
+    not pull in TensorFlow, and falls back to tf.lite.
+    """
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+
+    import tensorflow as tf
+    logger.warning("tflite-runtime not installed, falling back to tf.lite.Interpreter")
+    return tf.lite.Interpreter
+
+
+class _Session:
+    """One interpreter with its tensor details; used by a single thread at a time"""
+
+    def __init__(self, model_path, num_threads):
+        self.interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._update_details()
+
+    def _update_details(self):
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input['shape'][0])
+
+    def resize(self, shape):
+        """Reallocate tensors for a new input batch shape"""
+        self.interpreter.resize_tensor_input(self.input['index'], shape)
+        self.interpreter.allocate_tensors()
+        self._update_details()
+
+
+class TFLiteModel:
+    """
+    Wrapper exposing a Keras-style predict() on top of a TFLite interpreter.
+    Handles dynamic batch sizes and quantized (int8/uint8) input and output.
+
+    TFLite interpreters are not thread-safe, so each calling thread gets its
+    own interpreter session. The model file is memory-mapped, so sessions
+    share the weights and only add their own activation buffers.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        """
+        Load a .tflite model
+
+        Args:
+            model_path: Path to the .tflite file
+            num_threads: Interpreter threads per session (default: runtime's choice)
+        """
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self._local = threading.local()
+
+        # Load eagerly in the constructing thread so bad model files fail fast
+        self._input_shape = tuple(int(dim) for dim in self._session().input['shape'])
+
+    def _session(self):
+        """Get the calling thread's interpreter session, creating it on first use"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = _Session(self.model_path, self.num_threads)
+            self._local.session = session
+        return session
+
+    @property
+    def input_shape(self):
+        """Input shape including the batch dimension, like keras Model.input_shape"""
+        return (None,) + self._input_shape[1:]
+
+    def predict(self, batch, **kwargs):
+        """
+        Run inference on a batch of preprocessed images
+
+        Args:
+            batch: float32 array of shape (n, height, width, channels)
+
+        Returns:
+            numpy array: float32 model outputs of shape (n, outputs)
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        session = self._session()
+
+        if batch.shape[0] != session.batch_size:
+            session.resize(batch.shape)
+
+        input_dtype = session.input['dtype']
+        if input_dtype != np.float32:
+            scale, zero_point = session.input['quantization']
+            info = np.iinfo(input_dtype)
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_dtype)
+
+        session.interpreter.set_tensor(session.input['index'], batch)
+        session.interpreter.invoke()
+        output = session.interpreter.get_tensor(session.output['index'])
+
+        if session.output['dtype'] != np.float32:
+            scale, zero_point = session.output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+
+        return output
+
+
+def export_tflite(keras_model, output_path, quantization=None, representative_images=None):
+    """
+    Convert a Keras model to a TFLite flatbuffer
+
+    Args:
+        keras_model: tf.keras model to convert
+        output_path: Where to write the .tflite file
+        quantization: None for float32, 'float16' for float16 weights or
+            'int8' for full integer quantization
+        representative_images: Preprocessed images used to calibrate int8
+            activation ranges; synthetic images are used if None, which is
+            only suitable for the untrained demo model
+
+    Returns:
+        int: Size of the written model in bytes
+    """
+    import tensorflow as tf
+
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {quantization}")
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if representative_images is None:
+            shape = (64,) + tuple(keras_model.input_shape[1:])
+            representative_images = np.random.default_rng(0).random(shape, dtype=np.float32)
+
+        def representative_dataset():
+            for image in representative_images:
+                yield [np.asarray(image, dtype=np.float32)[np.newaxis]]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    flatbuffer = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(flatbuffer)
+
+    logger.info(f"Exported {quantization or 'float32'} TFLite model to {output_path} ({len(flatbuffer)} bytes)")
+    return len(flatbuffer)
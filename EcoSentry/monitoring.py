@@ -0,0 +1,226 @@
+import numpy as np
+import json
+import os
+import sys
+import time
+import bisect
+import threading
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Help text for each metric family
+METRICS = {
+    'ecosentry_stage_duration_seconds': 'Time spent in each processing stage',
+    'ecosentry_request_duration_seconds': 'Time spent handling each API endpoint'
+}
+
+
+class MetricsRegistry:
+    """
+    Latency histograms stored in a fixed-size NumPy array.
+
+    Each row is one (metric, label) series holding bucket counts followed by
+    the sum of observed values. When a directory is given the array is a
+    memory-mapped file per process, so /metrics in any gunicorn worker can
+    add up the histograms of every worker.
+    """
+
+    def __init__(self, directory=None, capacity=128):
+        """
+        Initialize the registry
+
+        Args:
+            directory: Shared directory for per-process metric files, or None
+                to keep metrics in memory for a single process
+            capacity: Maximum number of series per process
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._pid = None
+        self._values = None
+        self._series = {}
+
+    def _storage(self):
+        """Get this process's array, creating it after startup or a fork"""
+        pid = os.getpid()
+        if pid != self._pid:
+            shape = (self.capacity, len(BUCKETS) + 2)
+            if self.directory:
+                os.makedirs(self.directory, exist_ok=True)
+                path = os.path.join(self.directory, f'metrics_{pid}.npy')
+                self._values = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
+            else:
+                self._values = np.zeros(shape, dtype=np.float64)
+            self._series = {}
+            self._pid = pid
+        return self._values
+
+    def _register(self, key):
+        """Assign an array row to a new (metric, label name, label value) series"""
+        if len(self._series) >= self.capacity:
+            logger.warning(f"Metrics capacity reached, dropping series {key}")
+            return None
+
+        row = len(self._series)
+        self._series[key] = row
+        if self.directory:
+            # Publish the row names next to the array for other processes
+            path = os.path.join(self.directory, f'metrics_{self._pid}.json')
+            with open(path + '.tmp', 'w') as f:
+                json.dump([list(k) for k in self._series], f)
+            os.replace(path + '.tmp', path)
+        return row
+
+    def observe(self, metric, label, value, seconds):
+        """Record one observation of a histogram series"""
+        bucket = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            values = self._storage()
+            key = (metric, label, value)
+            row = self._series.get(key)
+            if row is None:
+                row = self._register(key)
+                if row is None:
+                    return
+            values[row, bucket] += 1
+            values[row, -1] += seconds
+
+    def time(self, metric, label, value):
+        """Get a context manager that observes the duration of its block"""
+        return _Timer(self, metric, label, value)
+
+    def _collect(self):
+        """Sum series across all processes writing to the shared directory"""
+        totals = {}
+        if not self.directory:
+            with self._lock:
+                values = self._storage()
+                for key, row in self._series.items():
+                    totals[key] = values[row].copy()
+            return totals
+
+        for name in os.listdir(self.directory):
+            if not (name.startswith('metrics_') and name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'r') as f:
+                    keys = [tuple(key) for key in json.load(f)]
+                values = np.load(os.path.join(self.directory, name[:-len('.json')] + '.npy'), mmap_mode='r')
+            except (OSError, ValueError):
+                continue
+            for row, key in enumerate(keys):
+                totals[key] = totals.get(key, 0) + np.asarray(values[row])
+        return totals
+
+    def render(self):
+        """
+        Render all histograms in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics page content
+        """
+        totals = self._collect()
+        lines = []
+        for metric, help_text in METRICS.items():
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} histogram')
+            for (name, label, value), data in sorted(totals.items()):
+                if name != metric:
+                    continue
+                labels = f'{label}="{value}"'
+                cumulative = np.cumsum(data[:-1])
+                for bound, count in zip(BUCKETS + ('+Inf',), cumulative):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {int(count)}')
+                lines.append(f'{metric}_sum{{{labels}}} {data[-1]:.6f}')
+                lines.append(f'{metric}_count{{{labels}}} {int(cumulative[-1])}')
+        return '\n'.join(lines) + '\n'
+
+
+class _Timer:
+    """Context manager that records elapsed wall time into a histogram"""
+
+    __slots__ = ('registry', 'metric', 'label', 'value', 'start')
+
+    def __init__(self, registry, metric, label, value):
+        self.registry = registry
+        self.metric = metric
+        self.label = label
+        self.value = value
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.metric, self.label, self.value, time.perf_counter() - self.start)
+        return False
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that periodically samples the stacks of all threads.
+
+    Stacks are aggregated in the collapsed format used by flame graph tools,
+    so the profile can be left running in production at a small, fixed cost
+    per sample rather than per function call.
+    """
+
+    def __init__(self, interval=0.01):
+        """Initialize the profiler with a sampling interval in seconds"""
+        self.interval = interval
+        self.samples = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start sampling in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Sampling loop"""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        """
+        Get the aggregated profile
+
+        Returns:
+            str: One 'frame;frame;frame count' line per distinct stack
+        """
+        return '\n'.join(f'{stack} {count}' for stack, count in self.samples.most_common()) + '\n'
+
+
+# Process-wide registry; set ECOSENTRY_METRICS_DIR to aggregate across gunicorn workers
+registry = MetricsRegistry(os.environ.get('ECOSENTRY_METRICS_DIR'))
+
+
+def timed(stage):
+    """Time a processing stage, e.g. `with timed('inference'): ...`"""
+    return registry.time('ecosentry_stage_duration_seconds', 'stage', stage)
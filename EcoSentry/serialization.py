@@ -0,0 +1,146 @@
+import numpy as np
+import json
+import struct
+from flask import Response, jsonify, request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+
+# Packed columns: a little-endian uint32 header length, a JSON header
+# ({"rows": n, "columns": [...], ...}) padded with spaces to a multiple of
+# 4 bytes, then one float32 little-endian array of n values per column. Every
+# column starts on a 4-byte boundary, so clients can wrap each one in a
+# Float32Array view without copying or parsing.
+COLUMNS_MIMETYPE = 'application/vnd.ecosentry.columns'
+
+
+def _offered(columnar):
+    """Response formats an endpoint can produce, JSON first as the default"""
+    offered = [JSON_MIMETYPE]
+    if msgpack is not None:
+        offered.append(MSGPACK_MIMETYPE)
+    if columnar:
+        offered.append(COLUMNS_MIMETYPE)
+    return offered
+
+
+def negotiate(columnar=False):
+    """
+    Pick the response format from the request's Accept header
+
+    Args:
+        columnar: Whether the endpoint can produce packed columns
+
+    Returns:
+        str: One of JSON_MIMETYPE, MSGPACK_MIMETYPE or COLUMNS_MIMETYPE
+    """
+    offered = _offered(columnar)
+    if not request.accept_mimetypes or request.accept_mimetypes.best == '*/*':
+        return JSON_MIMETYPE
+    return request.accept_mimetypes.best_match(offered, default=JSON_MIMETYPE)
+
+
+def pack_columns(columns, **header):
+    """
+    Encode equal-length numeric columns in the packed columns format
+
+    Args:
+        columns: Dictionary of column name to 1D array, in output order
+        **header: Extra JSON-serializable header fields
+
+    Returns:
+        bytes: Encoded body
+    """
+    arrays = [np.ascontiguousarray(values, dtype='<f4') for values in columns.values()]
+    rows = len(arrays[0]) if arrays else 0
+    if any(len(array) != rows for array in arrays):
+        raise ValueError("Columns must have equal lengths")
+
+    text = json.dumps(dict(header, rows=rows, columns=list(columns))).encode('utf-8')
+    text += b' ' * (-(4 + len(text)) % 4)
+    return b''.join([struct.pack('<I', len(text)), text] + [array.tobytes() for array in arrays])
+
+
+def unpack_columns(body):
+    """
+    Decode a packed columns body without copying the column data
+
+    Returns:
+        tuple: (header dict, dictionary of column name to read-only float32 array)
+    """
+    view = memoryview(body)
+    if len(view) < 4:
+        raise ValueError("Packed columns body is too short")
+    (length,) = struct.unpack_from('<I', view)
+    header = json.loads(bytes(view[4:4 + length]).decode('utf-8'))
+
+    try:
+        rows = int(header['rows'])
+        names = [str(name) for name in header['columns']]
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid packed columns header: {e!r}")
+
+    offset = 4 + length
+    if rows < 0 or len(view) != offset + 4 * rows * len(names):
+        raise ValueError("Packed columns body does not match its header")
+
+    columns = {
+        name: np.frombuffer(body, dtype='<f4', count=rows, offset=offset + 4 * rows * i)
+        for i, name in enumerate(names)
+    }
+    return header, columns
+
+
+def read_body():
+    """
+    Decode a JSON, MessagePack or packed columns request body
+
+    Packed columns are returned as a dict of the header fields plus one
+    float32 array per column.
+
+    Returns:
+        dict: Decoded request data
+    """
+    if request.mimetype == MSGPACK_MIMETYPE:
+        if msgpack is None:
+            raise ValueError("MessagePack support requires the msgpack package")
+        data = msgpack.unpackb(request.get_data(), raw=False)
+    elif request.mimetype == COLUMNS_MIMETYPE:
+        header, columns = unpack_columns(request.get_data())
+        data = dict(header, **columns)
+    else:
+        data = request.get_json(force=True, silent=True) or {}
+
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be an object")
+    return data
+
+
+def respond(payload, columns=None, header=None):
+    """
+    Serialize a response in the format the client asked for
+
+    Args:
+        payload: JSON-serializable data, or a callable producing it, used for
+            JSON and MessagePack responses
+        columns: Dictionary of column name to array served to clients that
+            accept packed columns (None if the endpoint is not columnar)
+        header: Extra header fields for packed columns responses
+
+    Returns:
+        flask.Response: Encoded response
+    """
+    mimetype = negotiate(columnar=columns is not None)
+
+    if mimetype == COLUMNS_MIMETYPE:
+        return Response(pack_columns(columns, **(header or {})), mimetype=COLUMNS_MIMETYPE)
+
+    data = payload() if callable(payload) else payload
+    if mimetype == MSGPACK_MIMETYPE:
+        return Response(msgpack.packb(data, use_bin_type=True), mimetype=MSGPACK_MIMETYPE)
+    return jsonify(data)
@@ -101,6 +101,20 @@ EcoSentry.api = {
             });
     },
     
+    /**
+     * Fetch fire incidents merged from active fire detections
+     * @returns {Promise} Promise with incident data
+     */
+    getIncidents: function() {
+        return fetch(`${EcoSentry.apiBase}/incidents`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Network response was not ok');
+                }
+                return response.json();
+            });
+    },
+    
     /**
      * Predict fire risk for a location and weather conditions
      * @param {Object} data - Location and weather data
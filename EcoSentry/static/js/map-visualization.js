@@ -98,6 +98,14 @@ class FireRiskMap {
                 this.data.resources = data.resources || [];
                 
                 this.updateMap();
+                
+                // Show one marker per incident rather than per detection
+                EcoSentry.api.getIncidents()
+                    .then(incidents => {
+                        this.data.activeFires = incidents.incidents;
+                        this.updateMap();
+                    })
+                    .catch(error => console.error('Error loading incidents:', error));
             })
             .catch(error => {
                 console.error('Error loading data:', error);
@@ -222,22 +230,27 @@ class FireRiskMap {
     addRiskZone(area) {
         const color = EcoSentry.utils.getRiskColor(area.risk_score);
         
-        const circle = L.circle([area.center.lat, area.center.lng], {
+        const style = {
             color: color,
             fillColor: color,
-            fillOpacity: 0.4,
-            radius: area.radius
-        }).addTo(this.layers.riskZones);
+            fillOpacity: 0.4
+        };
+        
+        // Polygon zones carry a GeoJSON geometry; others are circles
+        const zone = area.geometry
+            ? L.geoJSON(area.geometry, {style: style})
+            : L.circle([area.center.lat, area.center.lng], {...style, radius: area.radius});
+        zone.addTo(this.layers.riskZones);
         
-        circle.bindTooltip(`${area.name} - Risk: ${area.risk_score.toFixed(2)}`);
+        zone.bindTooltip(`${area.name} - Risk: ${area.risk_score.toFixed(2)}`);
         
-        circle.on('click', () => {
+        zone.on('click', () => {
             if (typeof this.onAreaSelected === 'function') {
                 this.onAreaSelected(area);
             }
         });
         
-        return circle;
+        return zone;
     }
     
     /**
@@ -254,7 +267,8 @@ class FireRiskMap {
         const marker = L.marker([fire.location.lat, fire.location.lng], {icon: fireIcon})
             .addTo(this.layers.fires);
             
-        marker.bindTooltip(`${fire.name} - Active since: ${fire.started}`);
+        const detections = fire.detections > 1 ? ` (${fire.detections} detections)` : '';
+        marker.bindTooltip(`${fire.name} - Active since: ${fire.started}${detections}`);
         
         marker.on('click', () => {
             if (typeof this.onFireSelected === 'function') {
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app and models relative to the project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,17 @@
+import logging
+from models.fire_predictor import FireRiskPredictor
+from models.risk_training import RiskModelTrainer
+
+
+def test_weatherless_bundle_is_flagged_and_warns_on_load(tmp_path, caplog):
+    trainer = RiskModelTrainer(cache_dir=str(tmp_path / 'cache'), workers=1)
+    output = str(tmp_path / 'model.joblib')
+    with caplog.at_level(logging.WARNING):
+        bundle = trainer.train(output_path=output, n_estimators=5, n_jobs=1)
+    assert bundle['metadata']['weather'] is False
+    assert 'WITHOUT weather' in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        FireRiskPredictor().load_model(output)
+    assert 'trained without weather' in caplog.text
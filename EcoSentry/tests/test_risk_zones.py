@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from data.risk_zones import RiskZones, circle_polygon
+
+
+@pytest.fixture
+def zones():
+    return RiskZones([circle_polygon(37.7, -122.4, 5000), circle_polygon(38.5, -121.5, 5000)])
+
+
+def test_classify_non_finite_points(zones):
+    lats = np.array([37.7, np.nan, 38.5, np.inf, 37.7])
+    lngs = np.array([-122.4, -122.4, -121.5, -121.5, -np.inf])
+    assert zones.classify(lats, lngs).tolist() == [0, -1, 1, -1, -1]
+    assert zones.classify([np.nan], [np.nan]).tolist() == [-1]
+
+
+def test_classify_endpoint_nan_point():
+    from app import app
+    client = app.test_client()
+    body = '{"points": [[NaN, -122.4], [Infinity, 0], [0, 0]]}'
+    response = client.post('/api/risk-zones/classify', data=body, content_type='application/json')
+    assert response.status_code == 200
+    assert response.get_json()['risk_area_ids'] == [None, None, None]
@@ -0,0 +1,33 @@
+import numpy as np
+from data.data_processor import FireDataProcessor
+from data.weather_store import WeatherStore
+
+REGION_CENTERS = {'Bay Area': {'lat': 37.7, 'lng': -122.4}}
+
+
+def test_empty_store_lookup_matches_nothing():
+    # No forecast region matches a risk area, so the store has no times
+    store = WeatherStore.from_forecast(
+        {'current': {'Nowhere': {'date': '2025-05-20', 'temperature': 30}}}, REGION_CENTERS
+    )
+    assert len(store.times) == 0
+
+    weather = store.lookup([37.7, 38.0], [-122.4, -122.0], '2025-05-20')
+    assert set(weather) == {'temperature', 'humidity', 'wind_speed', 'precipitation'}
+    assert all(np.isnan(values).all() and values.shape == (2,) for values in weather.values())
+
+
+def test_build_weather_store_without_matching_regions(tmp_path):
+    processor = FireDataProcessor(data_dir=str(tmp_path))
+    processor.risk_data = [{'name': 'Bay Area', 'center': REGION_CENTERS['Bay Area']}]
+    processor.weather_data = {'current': {'Nowhere': {'date': '2025-05-20', 'temperature': 30}}}
+    assert processor.build_weather_store() is None
+
+
+def test_stale_forecast_falls_back(tmp_path):
+    store = WeatherStore.from_forecast(
+        {'current': {'Bay Area': {'date': '2025-05-20', 'temperature': 30}}}, REGION_CENTERS,
+        time_tolerance=np.timedelta64(1, 'D')
+    )
+    assert store.lookup([37.7], [-122.4], '2025-05-20T12:00')['temperature'][0] == 30
+    assert np.isnan(store.lookup([37.7], [-122.4], '2025-07-01')['temperature'][0])